@@ -2,17 +2,53 @@ import pygame
 import math
 import random
 import os
+import time
+import importlib
+import numpy as np
 from pathlib import Path
+from particles import ParticleSystem
+from projectiles import ProjectileStore, PLAYER, SHADOW
+from spatial import SpatialHash
+from rotation import RotationCache
+from render import DirtyRenderer
+from display import ScaledDisplay, TextureRenderer
+from text import TextCache
+from assets import AssetManager, save_atlas
+from pacing import FixedTimestep, FrameStats
+from profiler import FrameProfiler, NULL_PROFILER
+from quality import QualityGovernor, QUALITY_LEVELS
+from scheduler import TimingWheel
+from replay import RandomStreams, InputRecorder
+from planner import ShadowPlanner
+from horde import ShadowHorde
+import create_sounds
+from music import MusicStreamer
+from audio import AudioManager
+from startup import StartupLoader
 
-# Initialize Pygame and mixer
-pygame.init()
-pygame.mixer.init()
-
-# Set up the display
+# Display settings (the window itself is opened by init_display)
 WIDTH = 800
 HEIGHT = 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Shadow Self")
+ARENA = pygame.Rect(0, 0, WIDTH, HEIGHT)
+# Gameplay counters (lifetimes, cooldowns, timers) are in ticks at 60 Hz
+TICK_RATE = 60
+TICK_MS = 1000 / TICK_RATE
+
+# Horde mode sends this many waves of lesser shadows, this many ticks apart
+HORDE_WAVES = 3
+HORDE_WAVE_TICKS = 600
+# Every shadow shot hits for this much in play; the level table's
+# shadow_damage is only used by fixed configs (balance sweeps) and the horde
+SHADOW_SHOT_DAMAGE = 5
+screen = None
+# Set when the game is drawn at a reduced resolution and scaled up
+scaled_display = None
+# With a scaled display there are two windows, so closing one is not a QUIT
+QUIT_EVENTS = (pygame.QUIT, pygame.WINDOWCLOSE)
+# Menu screens repaint on these, and otherwise sleep up to IDLE_WAIT_MS
+REDRAW_EVENTS = (pygame.VIDEOEXPOSE, pygame.VIDEORESIZE, pygame.WINDOWEXPOSED,
+                 pygame.WINDOWSIZECHANGED, pygame.WINDOWRESTORED)
+IDLE_WAIT_MS = 500
 
 # Colors
 WHITE = (255, 255, 255)
@@ -24,33 +60,91 @@ BLUE = (0, 0, 255)
 PURPLE = (128, 0, 128)
 ORANGE = (255, 165, 0)
 
-# Load explosion frames
+# Images are loaded once and shared by every sprite
+ASSETS = AssetManager("assets")
+
+# Sprite images (name, scale) that Game loads in the background at startup
+POWERUP_TYPES = ["health", "energy", "speed", "shield", "damage"]
+SPRITES = [("player.png", 0.5), ("shadow.png", 0.5)] + [
+    (f"{type}_powerup.png", 1) for type in POWERUP_TYPES]
+
+def preload_sprites():
+    for name, scale in SPRITES:
+        ASSETS.image(name, scale)
+
+# Explosion frames are filled in at startup once there is a window
 EXPLOSION_FRAMES = []
-try:
-    for i in range(8):
-        frame = pygame.image.load(f"assets/explosion_{i}.png").convert_alpha()
-        EXPLOSION_FRAMES.append(frame)
-except Exception as e:
-    # Create default explosion frames if loading fails
-    for i in range(8):
-        size = 64
-        frame = pygame.Surface((size, size), pygame.SRCALPHA)
-        radius = int(size/2 * ((i+1)/8))
-        pygame.draw.circle(frame, (255, 200, 50, 200), (size//2, size//2), radius)
-        pygame.draw.circle(frame, (255, 100, 0, 200), (size//2, size//2), radius//2)
-        EXPLOSION_FRAMES.append(frame)
+
+def load_explosion_frames():
+    EXPLOSION_FRAMES.clear()
+    try:
+        for i in range(8):
+            frame = ASSETS.load(f"explosion_{i}.png")
+            EXPLOSION_FRAMES.append(frame)
+    except Exception as e:
+        # Create default explosion frames if loading fails
+        EXPLOSION_FRAMES.clear()
+        for i in range(8):
+            size = 64
+            frame = pygame.Surface((size, size), pygame.SRCALPHA)
+            radius = int(size/2 * ((i+1)/8))
+            pygame.draw.circle(frame, (255, 200, 50, 200), (size//2, size//2), radius)
+            pygame.draw.circle(frame, (255, 100, 0, 200), (size//2, size//2), radius//2)
+            EXPLOSION_FRAMES.append(frame)
+
+def init_display(render_scale=1.0, window_size=None, fullscreen=False, gpu=False):
+    """Initialize the parts of pygame the menu needs and open the game window
+
+    A render_scale other than 1, a window_size, fullscreen or gpu opens a
+    ScaledDisplay that draws the game at WIDTH x HEIGHT times render_scale
+    and lets the GPU scale it to the window.  The mixer and the images are
+    loaded afterwards, by Game's startup loader.
+    """
+    global screen, scaled_display
+    pygame.display.init()
+    pygame.font.init()
+    if render_scale != 1 or window_size is not None or fullscreen or gpu:
+        scaled_display = ScaledDisplay((WIDTH, HEIGHT), render_scale, window_size,
+                                       fullscreen, "Shadow Self")
+        screen = scaled_display.screen
+    else:
+        scaled_display = None
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Shadow Self")
+    ASSETS.convert_all()
+    return screen
+
+def flip_display():
+    """Show what has been drawn on screen, e.g. a menu"""
+    if scaled_display is not None:
+        scaled_display.show()
+    else:
+        pygame.display.flip()
+
+# Rotation caches shared by every sprite that rotates the same image
+ROTATION_STEP = 2  # Degrees between cached rotations
+ROTATIONS = {}
+
+def get_rotations(key, create_image):
+    if key not in ROTATIONS:
+        ROTATIONS[key] = RotationCache(create_image(), ROTATION_STEP)
+    return ROTATIONS[key]
+
+def create_arrow(color):
+    # Arrow pointing right with its tip at the center of the surface
+    surface = pygame.Surface((21, 21), pygame.SRCALPHA)
+    points = [
+        (10, 10),    # Tip
+        (0, 5),      # Left wing
+        (3, 10),     # Left indent
+        (0, 15)      # Right wing
+    ]
+    pygame.draw.polygon(surface, color, points)
+    return surface
 
 # Load assets
 def load_image(name, scale=1):
-    try:
-        image = pygame.image.load(os.path.join("assets", name))
-        return pygame.transform.scale(image, 
-                                   (image.get_width() * scale, 
-                                    image.get_height() * scale))
-    except:
-        surface = pygame.Surface((30, 30))
-        surface.fill(WHITE)
-        return surface
+    return ASSETS.image(name, scale)
 
 class PowerUp(pygame.sprite.Sprite):
     def __init__(self, x, y, type):
@@ -58,93 +152,57 @@ class PowerUp(pygame.sprite.Sprite):
         self.type = type
         self.image = load_image(f"{type}_powerup.png")
         self.rect = self.image.get_rect(center=(x, y))
-        self.lifetime = 300  # 5 seconds at 60 FPS
-
-    def update(self):
-        self.lifetime -= 1
-        if self.lifetime <= 0:
-            self.kill()
-
-class Particle(pygame.sprite.Sprite):
-    def __init__(self, x, y, color):
-        super().__init__()
-        self.image = pygame.Surface((4, 4))
-        self.image.fill(color)
-        self.rect = self.image.get_rect(center=(x, y))
-        self.velocity = [random.uniform(-2, 2), random.uniform(-2, 2)]
-        self.lifetime = 30
-
-    def update(self):
-        self.rect.x += self.velocity[0]
-        self.rect.y += self.velocity[1]
-        self.lifetime -= 1
-        if self.lifetime <= 0:
-            self.kill()
+        self.lifetime = 300  # 5 seconds at 60 FPS; the scheduler kills it
 
 class AttackIndicator(pygame.sprite.Sprite):
     def __init__(self, source, target):
         super().__init__()
         self.source = source
         self.target = target
-        self.lifetime = 30  # Half second at 60 FPS
-        self.image = pygame.Surface((20, 20), pygame.SRCALPHA)
-        self.rect = self.image.get_rect()
+        self.lifetime = 30  # Half second at 60 FPS; the scheduler kills it
+        color = (255, 255, 0) if isinstance(self.source, Shadow) else (255, 0, 0)
+        self.rotations = get_rotations(("arrow", color), lambda: create_arrow(color))
         self.update_position()
         
     def update(self):
         self.update_position()
-        self.lifetime -= 1
-        if self.lifetime <= 0:
-            self.kill()
     
     def update_position(self):
         # Calculate direction from source to target
         dx = self.target.rect.centerx - self.source.rect.centerx
         dy = self.target.rect.centery - self.source.rect.centery
-        angle = math.degrees(math.atan2(-dy, dx))
-        
-        # Create arrow shape
-        points = [
-            (0, 0),      # Tip
-            (-10, -5),   # Left wing
-            (-7, 0),     # Left indent
-            (-10, 5)     # Right wing
-        ]
+        self.angle = math.degrees(math.atan2(-dy, dx))
         
-        # Rotate points
-        rotated_points = []
-        for x, y in points:
-            rad = math.radians(-angle)
-            rx = x * math.cos(rad) - y * math.sin(rad)
-            ry = x * math.sin(rad) + y * math.cos(rad)
-            rotated_points.append((rx + self.source.rect.centerx, 
-                                 ry + self.source.rect.centery))
-        
-        # Draw arrow
-        self.image = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        color = (255, 255, 0) if isinstance(self.source, Shadow) else (255, 0, 0)
-        pygame.draw.polygon(self.image, color, rotated_points)
-        self.rect = self.image.get_rect()
+        # Use the cached arrow rotated towards the target, tip on the source
+        self.image = self.rotations.get(self.angle)
+        self.rect = self.image.get_rect(center=self.source.rect.center)
 
-class Projectile(pygame.sprite.Sprite):
-    def __init__(self, x, y, direction, angle=0):
-        super().__init__()
-        self.image = pygame.Surface((10, 10))
-        # Red for player, yellow for shadow
-        self.image.fill(RED if direction == 1 else YELLOW)
-        self.rect = self.image.get_rect()
-        self.rect.center = (x, y)
-        self.speed = 7
-        self.direction = direction
-        self.angle = math.radians(angle)
-        
-    def update(self):
-        # Move with angle
-        self.rect.x += self.speed * self.direction * math.cos(self.angle)
-        self.rect.y += self.speed * math.sin(self.angle)
-        if self.rect.right < 0 or self.rect.left > WIDTH or \
-           self.rect.bottom < 0 or self.rect.top > HEIGHT:
-            self.kill()
+class InputState:
+    """Player input for a single simulation step"""
+    def __init__(self, left=False, right=False, up=False, down=False,
+                 dash=False, shoot=False, aim=(0, 0)):
+        self.left = left
+        self.right = right
+        self.up = up
+        self.down = down
+        self.dash = dash
+        self.shoot = shoot
+        self.aim = aim
+
+    @classmethod
+    def from_devices(cls):
+        """Poll the keyboard and mouse"""
+        keys = pygame.key.get_pressed()
+        aim = pygame.mouse.get_pos()
+        if scaled_display is not None:
+            aim = scaled_display.to_game(aim)
+        return cls(left=keys[pygame.K_LEFT] or keys[pygame.K_a],
+                   right=keys[pygame.K_RIGHT] or keys[pygame.K_d],
+                   up=keys[pygame.K_UP] or keys[pygame.K_w],
+                   down=keys[pygame.K_DOWN] or keys[pygame.K_s],
+                   dash=keys[pygame.K_LSHIFT],
+                   shoot=keys[pygame.K_SPACE],
+                   aim=aim)
 
 class Player(pygame.sprite.Sprite):
     def __init__(self):
@@ -154,6 +212,7 @@ class Player(pygame.sprite.Sprite):
             self.original_image = pygame.Surface((30, 30))
             self.original_image.fill(WHITE)
         self.image = self.original_image.copy()  # Create a copy for rotation
+        self.rotations = get_rotations("player", lambda: self.original_image)
         self.rect = self.image.get_rect()
         self.rect.center = (WIDTH // 4, HEIGHT // 2)
         self.speed = 5
@@ -163,10 +222,11 @@ class Player(pygame.sprite.Sprite):
         self.max_health = 100
         self.energy = 100
         self.max_energy = 100
-        self.projectiles = pygame.sprite.Group()
-        self.speed_boost_timer = 0
-        self.invulnerable_timer = 0
-        self.dash_cooldown = 0
+        # Timers are stored as the tick they run out on
+        self.speed_boost_until = 0
+        self.invulnerable_until = 0
+        self.dash_cooldown_until = 0
+        self.speed_boost_entry = None
         self.dash_energy_cost = 30
         self.score = 0
         self.shield = 0
@@ -179,18 +239,17 @@ class Player(pygame.sprite.Sprite):
             "damage": 0
         }
 
-    def update(self):
-        keys = pygame.key.get_pressed()
+    def update(self, inputs):
         dx = 0
         dy = 0
         
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+        if inputs.left:
             dx -= self.speed
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+        if inputs.right:
             dx += self.speed
-        if keys[pygame.K_UP] or keys[pygame.K_w]:
+        if inputs.up:
             dy -= self.speed
-        if keys[pygame.K_DOWN] or keys[pygame.K_s]:
+        if inputs.down:
             dy += self.speed
 
         # Normalize diagonal movement
@@ -202,48 +261,64 @@ class Player(pygame.sprite.Sprite):
         self.rect.y += dy
         
         # Dash mechanic
-        if keys[pygame.K_LSHIFT] and self.dash_cooldown <= 0 and self.energy >= self.dash_energy_cost:
+        if inputs.dash and self.dash_cooldown <= 0 and self.energy >= self.dash_energy_cost:
             self.dash(dx, dy)
         
         # Shoot projectile
-        if keys[pygame.K_SPACE] and self.energy >= 20:
+        if inputs.shoot and self.energy >= 20:
             self.shoot()
             self.energy -= 20
             
-        # Update timers and status effects
-        if self.speed_boost_timer > 0:
-            self.speed_boost_timer -= 1
-            if self.speed_boost_timer <= 0:
-                self.speed = self.base_speed
-
-        if self.invulnerable_timer > 0:
-            self.invulnerable_timer -= 1
-
-        if self.dash_cooldown > 0:
-            self.dash_cooldown -= 1
-            
         # Energy regeneration
         if self.energy < self.max_energy:
             self.energy += 0.5
             
         # Keep player on screen
-        self.rect.clamp_ip(screen.get_rect())
-        
-        # Update projectiles
-        self.projectiles.update()
+        self.rect.clamp_ip(ARENA)
         
         # Mouse-based rotation
-        mouse_x, mouse_y = pygame.mouse.get_pos()
+        mouse_x, mouse_y = inputs.aim
         dx = mouse_x - self.rect.centerx
         dy = mouse_y - self.rect.centery
         self.angle = math.degrees(math.atan2(-dy, dx))
         
         # Rotate image
-        self.image = pygame.transform.rotate(self.original_image, self.angle)
+        self.image = self.rotations.get(self.angle)
         old_center = self.rect.center
         self.rect = self.image.get_rect()
         self.rect.center = old_center
 
+    @property
+    def speed_boost_timer(self):
+        return max(0, self.speed_boost_until - self.sim.frame)
+
+    @property
+    def invulnerable_timer(self):
+        return max(0, self.invulnerable_until - self.sim.frame)
+
+    @invulnerable_timer.setter
+    def invulnerable_timer(self, ticks):
+        self.invulnerable_until = self.sim.frame + ticks
+
+    @property
+    def dash_cooldown(self):
+        return max(0, self.dash_cooldown_until - self.sim.frame)
+
+    @dash_cooldown.setter
+    def dash_cooldown(self, ticks):
+        self.dash_cooldown_until = self.sim.frame + ticks
+
+    def boost_speed(self, ticks):
+        """Run at 1.5x base speed for ticks, restarting any current boost"""
+        self.speed = self.base_speed * 1.5
+        self.speed_boost_until = self.sim.frame + ticks
+        self.sim.scheduler.cancel(self.speed_boost_entry)
+        self.speed_boost_entry = self.sim.scheduler.schedule(ticks, self.end_speed_boost)
+
+    def end_speed_boost(self):
+        self.speed_boost_entry = None
+        self.speed = self.base_speed
+
     def dash(self, dx, dy):
         if dx == 0 and dy == 0:
             return
@@ -255,12 +330,10 @@ class Player(pygame.sprite.Sprite):
         self.rect.y += dy * 5
         
     def shoot(self):
-        if hasattr(self.game, 'sounds') and 'shoot' in self.game.sounds:
-            self.game.sounds['shoot'].play()
+        self.sim.events.append(("shoot",))
         angles = [-10, 0, 10] if self.energy >= 60 else [0]
-        for angle in angles:
-            projectile = Projectile(self.rect.centerx, self.rect.centery, 1, angle)
-            self.projectiles.add(projectile)
+        self.sim.projectiles.fire(self.rect.centerx, self.rect.centery, 1, angles,
+                                  PLAYER, 10 * self.damage_multiplier)
 
     def apply_powerup(self, type):
         if type == "health":
@@ -268,8 +341,7 @@ class Player(pygame.sprite.Sprite):
         elif type == "energy":
             self.energy = self.max_energy
         elif type == "speed":
-            self.speed = self.base_speed * 1.5
-            self.speed_boost_timer = 180
+            self.boost_speed(180)
         elif type == "shield":
             self.shield = 100
         elif type == "damage":
@@ -290,6 +362,16 @@ class Player(pygame.sprite.Sprite):
             elif stat == "damage":
                 self.damage_multiplier += 0.2
 
+    def fully_upgraded(self):
+        return all(count >= 5 for count in self.upgrades.values())
+
+    def carry_over(self, previous):
+        """Keep score and upgrades from the previous level's player"""
+        self.score = previous.score
+        for stat, count in previous.upgrades.items():
+            for _ in range(count):
+                self.upgrade(stat)
+
 class Shadow(pygame.sprite.Sprite):
     def __init__(self, player, level):
         super().__init__()
@@ -303,11 +385,12 @@ class Shadow(pygame.sprite.Sprite):
         self.speed = 4 + level * 0.5
         self.health = 100 + level * 20
         self.max_health = self.health
-        self.projectiles = pygame.sprite.Group()
         self.shoot_delay = max(30 - level * 5, 10)
         self.shoot_timer = 0
+        self.damage = SHADOW_SHOT_DAMAGE
         self.attack_pattern = 0
         self.pattern_timer = 0
+        self.planner = None  # Optional ShadowPlanner replacing the fixed patterns
         
     def update(self):
         self.pattern_timer += 1
@@ -315,7 +398,12 @@ class Shadow(pygame.sprite.Sprite):
             self.attack_pattern = (self.attack_pattern + 1) % 3
             self.pattern_timer = 0
 
-        if self.attack_pattern == 0:
+        move = self.planner.update(self) if self.planner is not None else None
+        if move is not None:
+            self.rect.x += move[0]
+            self.rect.y += move[1]
+            self.rect.clamp_ip(ARENA)
+        elif self.attack_pattern == 0:
             self.mirror_movement()
         elif self.attack_pattern == 1:
             self.circle_player()
@@ -327,8 +415,6 @@ class Shadow(pygame.sprite.Sprite):
         if self.shoot_timer >= self.shoot_delay:
             self.shoot()
             self.shoot_timer = 0
-            
-        self.projectiles.update()
 
     def mirror_movement(self):
         dx = (WIDTH - self.player.rect.centerx) - self.rect.centerx
@@ -355,65 +441,439 @@ class Shadow(pygame.sprite.Sprite):
             self.rect.y += (dy / dist) * (self.speed * 1.5)
         
     def shoot(self):
-        # Create attack indicator before shooting
-        self.game.indicators.add(AttackIndicator(self, self.player))
+        # Let the renderer show an attack indicator before shooting
+        self.sim.events.append(("shadow_shoot",))
         
-        if self.attack_pattern == 0:
+        pattern = self.planner.choose_shot(self) if self.planner is not None else None
+        if pattern is None:
+            pattern = self.attack_pattern
+        if pattern == 0:
             # Single shot
-            projectile = Projectile(self.rect.centerx, self.rect.centery, -1)
-            self.projectiles.add(projectile)
-        elif self.attack_pattern == 1:
+            angles = [0]
+        elif pattern == 1:
             # Spread shot
-            for angle in range(-30, 31, 30):
-                projectile = Projectile(self.rect.centerx, self.rect.centery, -1, angle)
-                self.projectiles.add(projectile)
+            angles = [-30, 0, 30]
         else:
             # Aimed shot
             dx = self.player.rect.centerx - self.rect.centerx
             dy = self.player.rect.centery - self.rect.centery
-            angle = math.degrees(math.atan2(dy, dx))
-            projectile = Projectile(self.rect.centerx, self.rect.centery, -1, angle)
-            self.projectiles.add(projectile)
+            angles = [math.degrees(math.atan2(dy, dx))]
+        self.sim.projectiles.fire(self.rect.centerx, self.rect.centery, -1, angles,
+                                  SHADOW, self.damage)
 
 class Explosion(pygame.sprite.Sprite):
-    def __init__(self, x, y):
+    """Explosion animation timed from its spawn tick on clock
+
+    The frame shown is worked out from the age when drawn, and the
+    scheduler kills the sprite once the last frame has played.  step > 1
+    skips frames so the animation is over sooner.
+    """
+    def __init__(self, x, y, clock, step=1):
         super().__init__()
         self.frames = EXPLOSION_FRAMES
-        self.index = 0
-        self.image = self.frames[self.index]
-        self.rect = self.image.get_rect(center=(x, y))
+        self.clock = clock
+        self.born = clock.now
         self.animation_speed = 2
-        self.counter = 0
+        self.step = step
+        self.lifetime = -(-len(self.frames) // step) * self.animation_speed
+        self.rect = self.frames[0].get_rect(center=(x, y))
 
-    def update(self):
-        self.counter += 1
-        if self.counter >= self.animation_speed:
-            self.counter = 0
-            self.index += 1
-            if self.index >= len(self.frames):
-                self.kill()
-            else:
-                self.image = self.frames[self.index]
+    @property
+    def index(self):
+        index = (self.clock.now - self.born) // self.animation_speed * self.step
+        return min(index, len(self.frames) - 1)
 
-class Game:
-    def __init__(self):
-        # Initialize sprite groups first
-        self.particles = pygame.sprite.Group()
-        self.powerups = pygame.sprite.Group()
+    @property
+    def image(self):
+        return self.frames[self.index]
+
+def level_config(level):
+    """Return the difficulty table entry for level"""
+    if level == 1:  # Tutorial level
+        return {
+            "shadow_health": 50,
+            "shadow_speed": 2,
+            "shadow_damage": 3,
+            "time_limit": 240,
+            "powerup_frequency": 0.005,
+            "shadow_planner": False,
+            "horde_wave": 40
+        }
+    elif level == 2:
+        return {
+            "shadow_health": 100,
+            "shadow_speed": 3,
+            "shadow_damage": 5,
+            "time_limit": 180,
+            "powerup_frequency": 0.01,
+            "shadow_planner": False,
+            "horde_wave": 60
+        }
+    else:
+        return {
+            "shadow_health": 100 + (level - 2) * 30,
+            "shadow_speed": 3 + (level - 2) * 0.3,
+            "shadow_damage": 5 + (level - 2) * 1,
+            "time_limit": max(120, 180 - (level - 2) * 10),
+            "powerup_frequency": min(0.02, 0.01 + (level - 2) * 0.002),
+            # From level 6 the shadow plans ahead instead of cycling patterns
+            "shadow_planner": level >= 6,
+            "horde_wave": min(150, 60 + (level - 2) * 20)
+        }
+
+class Simulation:
+    """Game rules for one match, with no display, mixer or fonts
+
+    Each call to step() consumes one InputState and returns the list of
+    events (shots, hits, pickups) the frame produced, so a renderer can
+    turn them into sounds and effects.  All randomness comes from streams
+    seeded by seed, so the same seed and inputs replay the same match.
+    In horde mode waves of lesser shadows join the Shadow, and the level
+    is only complete once all of them are beaten.
+    """
+    def __init__(self, level=1, seed=None, config=None, planner_budget_ms=2.0, horde=False):
         self.all_sprites = pygame.sprite.Group()
+        self.powerups = pygame.sprite.Group()
+        self.projectiles = ProjectileStore((WIDTH, HEIGHT))
+        self.grid = SpatialHash((WIDTH, HEIGHT))
+        self.horde = ShadowHorde((WIDTH, HEIGHT)) if horde else None
+        self.profiler = NULL_PROFILER
+        # None plans without the clock, so replays and sweeps are repeatable
+        self.planner_budget_ms = planner_budget_ms
+        self.level = level
+        # A fixed level configuration (e.g. from a balance sweep) replaces the table
+        self.config = config
+        self.player = None
+        self.events = []
+        self.reseed(seed)
+        self.reset_level()
+
+    def reseed(self, seed):
+        self.random = RandomStreams(seed)
+        self.seed = self.random.seed
+        self.powerup_rng = self.random.stream("powerups")
+        self.horde_rng = self.random.numpy("horde")
+
+    def reset_level(self, keep_player=False):
+        """Start the current level
+
+        Each level starts with a fresh player, as the game always has;
+        keep_player carries score and upgrades over instead.
+        """
+        # Clear all sprite groups
+        self.all_sprites.empty()
+        self.powerups.empty()
+        self.projectiles.empty()
+        if self.horde is not None:
+            self.horde.empty()
+        # Lifetimes and timers from the last level are dropped with it
+        self.scheduler = TimingWheel()
+        self.waves_left = HORDE_WAVES if self.horde is not None else 0
+        self.wave_timer = 0
+        
+        # Create new instances
+        previous = self.player
+        self.player = Player()
+        self.player.sim = self
+        if keep_player and previous is not None:
+            self.player.carry_over(previous)
+        self.shadow = Shadow(self.player, self.level)
+        self.shadow.sim = self
+        
+        # Get level configuration
+        config = self.get_level_config()
+        
+        # Apply level configuration
+        self.shadow.health = config["shadow_health"]
+        self.shadow.max_health = config["shadow_health"]
+        self.shadow.speed = config["shadow_speed"]
+        if self.config is not None:
+            self.shadow.damage = config["shadow_damage"]
+        if config.get("shadow_planner"):
+            self.shadow.planner = ShadowPlanner((WIDTH, HEIGHT), self.planner_budget_ms)
+        self.game_time = config["time_limit"]
+        
+        # Add sprites to group
+        self.all_sprites.add(self.player, self.shadow)
+        
+        # Reset time tracking
+        self.frame = 0
+        self.time_ms = 0
+        self.remaining_time = self.game_time
+        self.damage_taken = 0
+        self.outcome = None
+
+    def step(self, inputs, dt=TICK_MS):
+        """Advance the match by one tick of dt milliseconds"""
+        self.events = []
+        self.frame += 1
+        self.time_ms += dt
+        self.scheduler.advance()
+        
+        # Remember where actors were so renderers can interpolate
+        for sprite in self.all_sprites:
+            sprite.prev_center = sprite.rect.center
+        
+        # Update
+        profiler = self.profiler
+        with profiler.phase("actors"):
+            self.player.update(inputs)
+            if self.shadow.alive():
+                self.shadow.update()
+            if self.horde is not None:
+                self.update_horde()
+        with profiler.phase("projectiles"):
+            self.projectiles.update()
+        with profiler.phase("powerups"):
+            self.spawn_powerup()
+        
+        # Collision detection
+        with profiler.phase("broadphase"):
+            self.build_broadphase()
+        with profiler.phase("collisions"):
+            self.handle_collisions()
+        
+        # Calculate remaining time
+        self.remaining_time = max(0, self.game_time - int(self.time_ms // 1000))
+        
+        # Level completion and game over checks
+        if self.shadow.health <= 0 and self.horde is not None and self.shadow.alive():
+            self.shadow.kill()
+        if self.shadow.health <= 0 and not self.waves_left and not self.horde:
+            self.outcome = "level_complete"
+        elif self.player.health <= 0 or self.remaining_time <= 0:
+            self.outcome = "game_over"
+        return self.events
+
+    def update_horde(self):
+        # Send the next wave in on a timer
+        if self.waves_left:
+            self.wave_timer -= 1
+            if self.wave_timer <= 0:
+                config = self.get_level_config()
+                self.horde.spawn(config["horde_wave"], self.horde_rng,
+                                 health=20 + 5 * self.level,
+                                 speed=config["shadow_speed"] * 0.75,
+                                 damage=config["shadow_damage"])
+                self.waves_left -= 1
+                self.wave_timer = HORDE_WAVE_TICKS
+        self.horde.update(self.player.rect.center, self.projectiles, SHADOW, self.grid)
+
+    def complete_level(self):
+        self.level += 1
+        self.player.score += 1000 * self.level
+
+    def spawn_powerup(self):
+        config = self.get_level_config()
+        rng = self.powerup_rng
+        if rng.random() < config["powerup_frequency"]:
+            x = rng.randint(50, WIDTH-50)
+            y = rng.randint(50, HEIGHT-50)
+            type = rng.choice(POWERUP_TYPES)
+            self.add_powerup(x, y, type)
+
+    def add_powerup(self, x, y, type):
+        powerup = PowerUp(x, y, type)
+        self.powerups.add(powerup)
+        self.scheduler.schedule(powerup.lifetime, powerup.kill)
+        return powerup
+
+    def build_broadphase(self):
+        """Rebuild the spatial hash used by collisions and other queries"""
+        self.grid.clear()
+        projectiles = self.projectiles
+        self.grid.insert_points(projectiles.pos[:projectiles.count, 0],
+                                projectiles.pos[:projectiles.count, 1],
+                                "projectiles", projectiles.size / 2)
+        if self.shadow.alive():
+            self.grid.insert(self.shadow, self.shadow.rect, "enemies")
+        for powerup in self.powerups:
+            self.grid.insert(powerup, powerup.rect, "powerups")
+        if self.horde:
+            self.horde.insert(self.grid)
+
+    def handle_collisions(self):
+        # Projectile collisions
+        projectiles = self.projectiles
+        shadow_hits = np.empty(0, dtype=np.intp)
+        if self.shadow.alive():
+            nearby = self.grid.query_points(self.shadow.rect, "projectiles")
+            shadow_hits = projectiles.hits(self.shadow.rect, PLAYER, nearby)
+        if len(shadow_hits):
+            self.shadow.health -= float(projectiles.damage[shadow_hits].sum())
+            self.player.score += 50 * len(shadow_hits)
+            for x, y in projectiles.centers(shadow_hits):
+                self.events.append(("hit", x, y))
+                
+        nearby = self.grid.query_points(self.player.rect, "projectiles")
+        player_hits = projectiles.hits(self.player.rect, SHADOW, nearby)
+        if len(player_hits) and self.player.invulnerable_timer <= 0:
+            for damage, (x, y) in zip(projectiles.damage[player_hits].tolist(),
+                                      projectiles.centers(player_hits)):
+                if self.player.shield > 0:
+                    self.player.shield -= damage
+                else:
+                    self.player.health -= damage
+                self.damage_taken += damage
+                self.events.append(("player_hit", x, y))
+        
+        # The rest of the player's shots can hit the horde
+        horde_hits = np.empty(0, dtype=np.intp)
+        if self.horde:
+            candidates = np.flatnonzero(projectiles.owner[:projectiles.count] == PLAYER)
+            candidates = np.setdiff1d(candidates, shadow_hits, assume_unique=True)
+            horde_hits, died = self.horde.hits(projectiles, candidates, self.grid)
+            self.player.score += 50 * len(horde_hits) + 100 * len(died)
+            for x, y in projectiles.centers(horde_hits):
+                self.events.append(("hit", x, y))
+            # Touching any number of them hurts like touching the Shadow
+            if self.horde.touching(self.player.rect, self.grid) and self.player.invulnerable_timer <= 0:
+                self.player.health -= 1
+                self.damage_taken += 1
+                self.events.append(("contact", self.player.rect.centerx, self.player.rect.centery))
+        
+        # Indices stay valid for the grid until all hit sets are removed
+        projectiles.remove(np.concatenate((shadow_hits, player_hits, horde_hits)))
+        
+        # Power-up collisions
+        for powerup in self.grid.query(self.player.rect, "powerups"):
+            if not self.player.rect.colliderect(powerup.rect):
+                continue
+            powerup.kill()
+            if powerup.type == "health":
+                self.player.health = min(self.player.max_health, self.player.health + 30)
+            elif powerup.type == "energy":
+                self.player.energy = self.player.max_energy
+            elif powerup.type == "speed":
+                self.player.boost_speed(180)
+            self.events.append(("powerup", powerup.rect.centerx, powerup.rect.centery))
+            self.player.score += 100
+        
+        # Direct collision
+        for enemy in self.grid.query(self.player.rect, "enemies"):
+            if self.player.rect.colliderect(enemy.rect) and self.player.invulnerable_timer <= 0:
+                self.player.health -= 1
+                self.damage_taken += 1
+                self.events.append(("contact", self.player.rect.centerx, self.player.rect.centery))
+
+    def get_level_config(self):
+        """Return configuration for current level"""
+        if self.config is not None:
+            return self.config
+        return level_config(self.level)
+
+class Game:
+    """Window, input, sound and effects around a Simulation"""
+    def __init__(self, dirty_rects=True, render_fps=60, max_catch_up=5,
+                 profile_path=None, seed=None, record_path=None, replay=None, horde=False,
+                 target_fps=None, adaptive_quality=True, render_scale=1.0, window_size=None,
+                 fullscreen=False, native_hud=True, gpu=False, startup_report=False):
+        # Only what the menu needs is set up here; the rest loads behind it
+        self.startup = StartupLoader()
+        self.startup_report = startup_report
+        init_display(render_scale, window_size, fullscreen, gpu)
+        self.startup.mark("display")
+        if replay is not None:
+            horde = replay.horde
+        # The GPU backend draws textures with the SDL renderer, the default blits surfaces
+        if gpu:
+            self.renderer = TextureRenderer(scaled_display, BLACK, scale=render_scale)
+        elif scaled_display is not None:
+            self.renderer = DirtyRenderer(scaled_display.world, BLACK, dirty_rects=dirty_rects,
+                                          scale=render_scale, output=scaled_display)
+        else:
+            self.renderer = DirtyRenderer(screen, BLACK, dirty_rects=dirty_rects)
+        self.render_scale = render_scale
+        # HUD text goes over the scaled world at full resolution unless native_hud is off
+        if scaled_display is not None and native_hud:
+            self.hud_blit = scaled_display.overlay
+        else:
+            self.hud_blit = self.renderer.blit
+        self.render_fps = render_fps
+        # Gameplay counters are tuned per tick, so the tick rate is fixed
+        self.timestep = FixedTimestep(TICK_RATE, max_catch_up)
+        self.pacing = FrameStats()
+        
+        # Scripted runs swap these for their own input and a fixed frame time
+        self.input_source = InputState.from_devices
+        self.fixed_frame_ms = None
+        
+        # Recording writes each match's inputs to record_path; a replay
+        # feeds a recorded match back one tick per frame
+        self.seed = seed
+        self.record_path = record_path
+        self.recorder = None
+        self.replay = replay
+        if replay is not None:
+            self.input_source = replay.next_input
+            self.fixed_frame_ms = self.timestep.tick_ms
+        
+        # Per-phase timings; F3 shows them, profile_path logs every frame
+        self.profiler = FrameProfiler(log=profile_path is not None)
+        self.profile_path = profile_path
+        self.show_profiler = False
+        self.profiler_lines = []
+        self.last_frame_time = time.perf_counter()
+        
+        # Effects scale down when frames run long (adaptive_quality=False pins them)
+        self.quality = QualityGovernor(target_fps or render_fps, enabled=adaptive_quality)
+        
+        # Initialize effect groups first
+        self.particles = ParticleSystem()
         self.explosions = pygame.sprite.Group()
         self.indicators = pygame.sprite.Group()
+        # Effect lifetimes run on their own wheel, advanced once per tick
+        self.effect_clock = TimingWheel()
+        self.music = None
+        # Silent until the startup loader has the mixer up
+        self.sounds = {}
+        self.audio = AudioManager()
+        self.muted = False
+        
+        # Red for player, yellow for shadow
+        self.projectile_images = {}
+        for owner, color in ((PLAYER, RED), (SHADOW, YELLOW)):
+            image = pygame.Surface((10, 10)).convert()
+            image.fill(color)
+            self.projectile_images[owner] = image
         
         # Then initialize other attributes
-        self.level = 1
+        # The planner's time budget makes it depend on the clock, so recorded
+        # and replayed matches plan without one to replay bit for bit
+        planner_budget_ms = None if record_path or replay is not None else 2.0
+        self.shake_rng = random.Random()
         self.high_score = self.load_high_score()
         self.font = pygame.font.Font(None, 36)
         self.title_font = pygame.font.Font(None, 74)
+        self.small_font = pygame.font.Font(None, 20)
+        self.text = TextCache()
         self.clock = pygame.time.Clock()
-        self.state = "menu"  # "menu", "playing", "paused", "game_over"
-        
-        # Finally call reset_level
-        self.reset_level()
+        self.state = "menu"  # "menu", "playing", "paused", "upgrade", "game_over"
+        # Every other state is a screen drawn once, then redrawn only when needed
+        self.idle_screens = {
+            "menu": (self.show_menu, self.menu_event),
+            "paused": (self.show_pause_menu, self.pause_event),
+            "upgrade": (self.show_upgrade_menu, self.upgrade_event),
+            "game_over": (self.show_game_over, self.game_over_event)
+        }
+        self.redraw = True
+        self.state_deadline = None
+        self.paused_frame = None
+        self.startup.mark("game")
+        
+        # Images, the simulation (whose sprites need them) and sounds load
+        # while the menu is up; start_match waits for them
+        self.startup.add("sprites", preload_sprites)
+        self.startup.add("simulation", self.build_simulation, seed, horde, planner_budget_ms)
+        self.startup.add("explosions", load_explosion_frames)
+        self.startup.add("mixer", pygame.mixer.init)
+        self.startup.add("music", self.start_music)
+        self.startup.add("sounds", self.start_sounds)
+        self.startup.start()
+        if replay is not None:
+            self.sim.level = replay.level
+            self.state = "playing"
+            self.start_match()
         self.tutorial_messages = [
             "Use WASD or Arrow Keys to move",
             "Left Click or SPACE to shoot",
@@ -423,32 +883,51 @@ class Game:
         ]
         self.tutorial_index = 0
         self.show_tutorial = True
-        
-        # Initialize sound system
-        if not os.path.exists("sounds"):
-            os.makedirs("sounds")
-            
-        # Load sounds with error handling
-        self.sounds = {}
+
+    def __getattr__(self, name):
+        # Only reached while the loader is still building the simulation
+        if name == "sim":
+            self.startup.wait()
+            if "sim" in self.__dict__:
+                return self.__dict__["sim"]
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def build_simulation(self, seed, horde, planner_budget_ms):
+        sim = Simulation(seed=seed, horde=horde, planner_budget_ms=planner_budget_ms)
+        sim.profiler = self.profiler
+        if horde:
+            size = sim.horde.size
+            self.horde_image = pygame.transform.smoothscale(sim.shadow.image, (size, size))
+        self.sim = sim
+
+    def start_music(self):
+        # Music is synthesized as it plays and follows the level
         try:
-            self.sounds = {
-                'shoot': pygame.mixer.Sound('sounds/shoot.wav'),
-                'hit': pygame.mixer.Sound('sounds/hit.wav'),
-                'powerup': pygame.mixer.Sound('sounds/powerup.wav'),
-                'explosion': pygame.mixer.Sound('sounds/explosion.wav')
-            }
-            
-            # Set volume for sound effects
-            for sound in self.sounds.values():
-                sound.set_volume(0.3)  # 30% volume
-                
-            # Load and play background music
-            pygame.mixer.music.load('sounds/background.wav')
-            pygame.mixer.music.set_volume(0.5)  # 50% volume
-            pygame.mixer.music.play(-1)  # -1 means loop indefinitely
-            
+            music = MusicStreamer(volume=0.5)  # 50% volume
+            music.set_level(self.level)
+            music.start()
+            self.music = music
         except Exception as e:
-            print(f"Error loading sounds: {e}")
+            print(f"Error starting music: {e}")
+
+    def start_sounds(self):
+        # Sounds are synthesized (or read from their cache) and played on
+        # the channels after the music's
+        self.audio = AudioManager(first_channel=1)
+        self.load_sounds()
+
+    # The renderer reads match state straight from the simulation
+    @property
+    def player(self):
+        return self.sim.player
+
+    @property
+    def shadow(self):
+        return self.sim.shadow
+
+    @property
+    def level(self):
+        return self.sim.level
 
     def load_high_score(self):
         try:
@@ -461,418 +940,543 @@ class Game:
         with open("highscore.txt", "w") as file:
             file.write(str(max(self.high_score, self.player.score)))
 
-    def reset_level(self):
-        # Clear all sprite groups
-        self.all_sprites.empty()
-        self.powerups.empty()
+    def reset_level(self, keep_player=False):
+        self.sim.reset_level(keep_player)
         self.particles.empty()
-        
-        # Create new instances
-        self.player = Player()
-        self.player.game = self
-        self.shadow = Shadow(self.player, self.level)
-        self.shadow.game = self
-        
-        # Get level configuration
-        config = self.get_level_config()
-        
-        # Apply level configuration
-        self.shadow.health = config["shadow_health"]
-        self.shadow.max_health = config["shadow_health"]
-        self.shadow.speed = config["shadow_speed"]
-        self.game_time = config["time_limit"]
-        
-        # Add sprites to group
-        self.all_sprites.add(self.player, self.shadow)
-        
-        # Reset time tracking
-        self.start_time = pygame.time.get_ticks()
+        if self.music is not None:
+            self.music.set_level(self.level)
+        self.renderer.invalidate()
+        self.resume_clock()
 
-    def spawn_powerup(self):
-        config = self.get_level_config()
-        if random.random() < config["powerup_frequency"]:
-            x = random.randint(50, WIDTH-50)
-            y = random.randint(50, HEIGHT-50)
-            type = random.choice(["health", "energy", "speed", "shield", "damage"])
-            self.powerups.add(PowerUp(x, y, type))
+    def start_match(self):
+        """Reseed every random stream and start recording a new match"""
+        self.startup.wait()
+        seed = self.replay.seed if self.replay is not None else self.seed
+        self.sim.reseed(seed)
+        self.particles.rng = self.sim.random.numpy("particles")
+        self.shake_rng = self.sim.random.stream("shake")
+        if self.record_path:
+            self.recorder = InputRecorder(self.sim.seed, self.timestep.tick_rate, self.sim.level,
+                                          self.sim.horde is not None)
+        self.reset_level()
+
+    def finish_recording(self):
+        if self.recorder is not None:
+            self.recorder.save(self.record_path, self.sim)
+            print(f"Recorded {self.recorder.ticks} ticks to {self.record_path}")
+            self.recorder = None
+
+    def resume_clock(self):
+        """Restart frame timing so time spent in menus is not simulated"""
+        self.last_frame_time = time.perf_counter()
+        self.timestep.reset()
 
     def create_particles(self, x, y, color, amount=5):
-        for _ in range(amount):
-            self.particles.add(Particle(x, y, color))
+        self.particles.emit(x, y, color, self.quality.scale(amount))
+
+    def handle_sim_events(self, events):
+        """Turn simulation events into sounds and visual effects"""
+        for event in events:
+            kind = event[0]
+            if kind == "shoot":
+                self.audio.play('shoot')
+            elif kind == "shadow_shoot":
+                indicator = AttackIndicator(self.shadow, self.player)
+                self.indicators.add(indicator)
+                self.effect_clock.schedule(indicator.lifetime, indicator.kill)
+            elif kind == "hit":
+                self.audio.play('hit')
+                self.create_explosion(event[1], event[2])
+                self.create_particles(event[1], event[2], RED, 10)
+                self.create_screen_shake()
+            elif kind == "player_hit":
+                self.create_particles(event[1], event[2], WHITE)
+            elif kind == "powerup":
+                self.audio.play('powerup')
+                self.create_particles(event[1], event[2], BLUE)
+            elif kind == "contact":
+                self.create_particles(event[1], event[2], RED)
 
     def show_menu(self):
         screen.fill(BLACK)
-        title = self.title_font.render("Shadow Self", True, WHITE)
-        start_text = self.font.render("Press ENTER to Start", True, WHITE)
-        high_score_text = self.font.render(f"High Score: {self.high_score}", True, WHITE)
+        title = self.text.render(self.title_font, "Shadow Self", WHITE)
+        start_text = self.text.render(self.font, "Press ENTER to Start", WHITE)
+        high_score_text = self.text.render(self.font, f"High Score: {self.high_score}", WHITE)
         
         screen.blit(title, (WIDTH//2 - title.get_width()//2, HEIGHT//3))
         screen.blit(start_text, (WIDTH//2 - start_text.get_width()//2, HEIGHT//2))
         screen.blit(high_score_text, (WIDTH//2 - high_score_text.get_width()//2, HEIGHT*2//3))
         
-        pygame.display.flip()
+        flip_display()
 
     def run(self):
         running = True
         
         while running:
-            if self.state == "menu":
-                self.show_menu()
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        running = False
-                    if event.type == pygame.KEYDOWN:
-                        if event.key == pygame.K_RETURN:
-                            self.state = "playing"
-                            self.reset_level()
-                            
-            elif self.state == "playing":
+            if self.state == "playing":
                 running = self.game_loop()
-                
-            elif self.state == "paused":
-                self.show_pause_menu()
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        running = False
-                    if event.type == pygame.KEYDOWN:
-                        if event.key == pygame.K_p:
-                            self.state = "playing"
-                        if event.key == pygame.K_q:
-                            running = False
-
-            self.clock.tick(60)
+                self.clock.tick(self.render_fps)
+            else:
+                running = self.idle()
 
+        self.finish_recording()
+        if self.profile_path:
+            self.profiler.export(self.profile_path)
+        self.close()
+        if self.startup_report:
+            print(self.startup.report())
         pygame.quit()
 
-    def game_loop(self):
-        # Move time tracking outside the loop
-        current_time = pygame.time.get_ticks()
-        elapsed_time = (current_time - self.start_time) // 1000 if hasattr(self, 'start_time') else 0
-        
-        if not hasattr(self, 'start_time'):
-            self.start_time = current_time
-        
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+    def close(self):
+        """Stop the loader, sound and music threads; call before pygame.quit()"""
+        # Quitting during startup lets the loader finish before stopping sound
+        self.startup.wait()
+        self.audio.stop()
+        if self.music is not None:
+            self.music.stop()
+            self.music = None
+
+    def enter(self, state, timeout_ms=None):
+        """Switch to state; a screen state can time out after timeout_ms"""
+        self.state = state
+        self.redraw = True
+        self.state_deadline = None
+        if timeout_ms is not None:
+            self.state_deadline = time.perf_counter() + timeout_ms / 1000
+        if state == "playing":
+            self.renderer.invalidate()
+            self.resume_clock()
+
+    def idle(self):
+        """Show the current screen state and sleep until an event or its timeout
+
+        Screens are drawn once on entering the state and again only when
+        the window needs repainting, so a menu left open costs no CPU.
+        The state's handler gets each event, or None when the timeout set
+        by enter() runs out, and returns False to quit.
+        """
+        draw, handle = self.idle_screens[self.state]
+        if self.redraw:
+            self.redraw = False
+            draw()
+            self.startup.frame_shown()
+        wait_ms = IDLE_WAIT_MS
+        if self.state_deadline is not None:
+            left_ms = (self.state_deadline - time.perf_counter()) * 1000
+            if left_ms <= 0:
+                self.state_deadline = None
+                return handle(None)
+            wait_ms = min(wait_ms, math.ceil(left_ms))
+        event = pygame.event.wait(wait_ms)
+        if event.type == pygame.NOEVENT:
+            return True
+        if event.type in QUIT_EVENTS:
+            return False
+        if event.type in REDRAW_EVENTS:
+            self.redraw = True
+            return True
+        return handle(event)
+
+    def menu_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
+            self.start_match()
+            self.enter("playing")
+        return True
+
+    def pause_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_p:
+                self.paused_frame = None
+                self.enter("playing")
+            if event.key == pygame.K_q:
                 return False
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_p:
-                    self.state = "paused"
-                    return True
-                # Progress tutorial on spacebar
-                if event.key == pygame.K_SPACE and self.show_tutorial:
-                    self.tutorial_index = min(self.tutorial_index + 1, len(self.tutorial_messages) - 1)
-                if event.key == pygame.K_m:  # 'M' key toggles sound
-                    self.toggle_sound()
-        
-        # Update
-        self.all_sprites.update()
-        self.powerups.update()
-        self.particles.update()
-        self.explosions.update()
-        self.indicators.update()
-        self.spawn_powerup()
-        
-        # Collision detection
-        self.handle_collisions()
+        return True
+
+    def upgrade_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key in [pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4]:
+                stat = list(self.player.upgrades.keys())[event.key - pygame.K_1]
+                if self.player.upgrades[stat] < 5:
+                    self.player.upgrade(stat)
+                    if self.recorder is not None:
+                        self.recorder.upgrade(event.key - pygame.K_1)
+                    self.next_level()
+                    self.enter("playing")
+        return True
+
+    def game_over_event(self, event):
+        # Input is ignored until the screen has been up for its two seconds
+        if event is None:
+            if self.replay is not None:
+                return False
+            self.enter("menu")
+        return True
+
+    def next_level(self):
+        self.reset_level()
         
-        # Calculate remaining time
-        remaining_time = max(0, self.game_time - elapsed_time)
+        # Disable tutorial after first level
+        if self.level > 1:
+            self.show_tutorial = False
+
+    def game_loop(self):
+        profiler = self.profiler
+        profiler.begin_frame()
+        with profiler.phase("events"):
+            for event in pygame.event.get():
+                if event.type in QUIT_EVENTS:
+                    return False
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_p:
+                        # The pause screen is drawn over the last frame
+                        if isinstance(self.renderer, TextureRenderer):
+                            # The GPU backend never draws to the world surface
+                            scaled_display.capture(self.renderer.snapshot())
+                        elif scaled_display is not None:
+                            scaled_display.capture()
+                        self.paused_frame = screen.copy()
+                        self.enter("paused")
+                        return True
+                    # Progress tutorial on spacebar
+                    if event.key == pygame.K_SPACE and self.show_tutorial:
+                        self.tutorial_index = min(self.tutorial_index + 1, len(self.tutorial_messages) - 1)
+                    if event.key == pygame.K_m:  # 'M' key toggles sound
+                        self.toggle_sound()
+                    if event.key == pygame.K_F3:  # 'F3' toggles the profiler overlay
+                        self.show_profiler = not self.show_profiler
+                    if event.key == pygame.K_F5:  # 'F5' re-reads the sound parameters
+                        importlib.reload(create_sounds)
+                        self.load_sounds()
+        
+        # Run as many fixed ticks as the elapsed time calls for
+        now = time.perf_counter()
+        frame_ms = (now - self.last_frame_time) * 1000
+        self.last_frame_time = now
+        if self.fixed_frame_ms is not None:
+            frame_ms = self.fixed_frame_ms
+        ticks = self.timestep.advance(frame_ms)
+        inputs = self.input_source()
+        for _ in range(ticks):
+            self.tick(inputs)
+            if self.sim.outcome:
+                break
+        with profiler.phase("audio"):
+            self.audio.flush(self.sounds)
+        self.pacing.record(frame_ms, ticks)
         
         # Draw
-        self.draw_game(remaining_time)
+        self.draw_game(self.sim.remaining_time, self.timestep.alpha)
+        
+        profiler.count("ticks", ticks)
+        profiler.count("projectiles", len(self.sim.projectiles))
+        profiler.count("powerups", len(self.sim.powerups))
+        if self.sim.horde is not None:
+            profiler.count("horde", len(self.sim.horde))
+        profiler.count("particles", len(self.particles))
+        profiler.count("explosions", len(self.explosions))
+        profiler.count("indicators", len(self.indicators))
+        record = profiler.end_frame()
+        self.quality.observe(record["total_ms"])
+        if scaled_display is not None:
+            self.apply_render_scale()
         
         # Level completion check
-        if self.shadow.health <= 0:
-            self.level += 1
-            self.player.score += 1000 * self.level
+        if self.sim.outcome == "level_complete":
+            self.sim.complete_level()
             # Show upgrade menu before resetting level
-            if not self.show_upgrade_menu():
-                return False
-            self.reset_level()
-            self.start_time = pygame.time.get_ticks()
-            
-            # Disable tutorial after first level
-            if self.level > 1:
-                self.show_tutorial = False
+            if self.replay is not None:
+                choice = self.replay.next_upgrade()
+                if choice is not None:
+                    self.player.upgrade(list(self.player.upgrades)[choice])
+                self.next_level()
+            elif self.player.fully_upgraded():
+                # Nothing left to choose, so the upgrade screen is skipped
+                self.next_level()
+            else:
+                self.enter("upgrade")
         
         # Game over check
-        if self.player.health <= 0 or remaining_time <= 0:
-            self.show_game_over()
+        elif self.sim.outcome == "game_over":
+            self.finish_recording()
             self.save_high_score()
-            self.state = "menu"
+            self.enter("game_over", timeout_ms=2000)
+        
+        # A replay of a match that was quit part way stops where it ended
+        elif self.replay is not None and self.replay.done:
+            return False
             
         return True
 
-    def handle_collisions(self):
-        # Projectile collisions
-        for projectile in self.player.projectiles:
-            if pygame.sprite.collide_rect(projectile, self.shadow):
-                if 'hit' in self.sounds:
-                    self.sounds['hit'].play()
-                damage = 10 * self.player.damage_multiplier
-                self.shadow.health -= damage
-                self.create_explosion(projectile.rect.centerx, projectile.rect.centery)
-                self.create_particles(projectile.rect.centerx, projectile.rect.centery, RED, 10)
-                self.create_screen_shake()
-                projectile.kill()
-                self.player.score += 50
-                
-        for projectile in self.shadow.projectiles:
-            if pygame.sprite.collide_rect(projectile, self.player):
-                if self.player.invulnerable_timer <= 0:
-                    if self.player.shield > 0:
-                        self.player.shield -= 5
-                    else:
-                        self.player.health -= 5
-                    self.create_particles(projectile.rect.centerx, projectile.rect.centery, WHITE)
-                projectile.kill()
-        
-        # Power-up collisions
-        for powerup in pygame.sprite.spritecollide(self.player, self.powerups, True):
-            if 'powerup' in self.sounds:
-                self.sounds['powerup'].play()
-            if powerup.type == "health":
-                self.player.health = min(self.player.max_health, self.player.health + 30)
-            elif powerup.type == "energy":
-                self.player.energy = self.player.max_energy
-            elif powerup.type == "speed":
-                self.player.speed = self.player.base_speed * 1.5
-                self.player.speed_boost_timer = 180
-            self.create_particles(powerup.rect.centerx, powerup.rect.centery, BLUE)
-            self.player.score += 100
-        
-        # Direct collision
-        if pygame.sprite.collide_rect(self.player, self.shadow) and self.player.invulnerable_timer <= 0:
-            self.player.health -= 1
-            self.create_particles(self.player.rect.centerx, self.player.rect.centery, RED)
-
-    def draw_game(self, remaining_time):
-        # Create a temporary surface for screen shake
-        temp_surface = pygame.Surface((WIDTH, HEIGHT))
-        temp_surface.fill(BLACK)
-        
-        # Draw trails
-        if hasattr(self.player, 'rect'):
-            self.create_trail(self.player.rect.center, (100, 150, 255))
-            if self.player.dash_cooldown > 40:
-                for _ in range(5):
-                    self.create_trail(self.player.rect.center, (200, 220, 255))
+    def apply_render_scale(self):
+        # The governor can lower the internal resolution below the chosen one
+        scale = self.render_scale * self.quality.level.resolution
+        if scale != self.renderer.scale:
+            scaled_display.set_scale(scale)
+            self.renderer.set_surface(scaled_display.world, scale)
+
+    def tick(self, inputs):
+        """Run one simulation tick and the effects that follow it"""
+        if self.recorder is not None:
+            self.recorder.record(inputs)
+        events = self.sim.step(inputs, self.timestep.tick_ms)
+        with self.profiler.phase("effects"):
+            self.effect_clock.advance()
+            self.handle_sim_events(events)
+            
+            # Trails, thinned out at lower quality
+            if self.effect_clock.now % self.quality.level.trail_every == 0:
+                self.create_trail(self.player.rect.center, (100, 150, 255))
+                if self.player.dash_cooldown > 40:
+                    self.create_trail(self.player.rect.center, (200, 220, 255), 15)
+            
+            self.particles.update()
+            self.indicators.update()
+            if hasattr(self, 'screen_shake') and self.screen_shake > 0:
+                self.screen_shake -= 1
+
+    def interpolate(self, sprite, alpha):
+        """Return where to draw sprite's center between the last two ticks"""
+        x, y = sprite.rect.center
+        prev_x, prev_y = getattr(sprite, 'prev_center', (x, y))
+        return (round(prev_x + (x - prev_x) * alpha),
+                round(prev_y + (y - prev_y) * alpha))
+
+    def draw_game(self, remaining_time, alpha=1.0):
+        with self.profiler.phase("draw"):
+            self.draw_scene(remaining_time, alpha)
+        with self.profiler.phase("present"):
+            self.renderer.present()
+
+    def draw_scene(self, remaining_time, alpha):
+        # Screen shake moves the camera instead of copying the frame
+        self.renderer.begin(self.apply_screen_shake())
         
         # Draw all sprites
-        self.all_sprites.draw(temp_surface)
-        self.player.projectiles.draw(temp_surface)
-        self.shadow.projectiles.draw(temp_surface)
-        self.powerups.draw(temp_surface)
-        self.particles.draw(temp_surface)
-        self.explosions.draw(temp_surface)
-        self.indicators.draw(temp_surface)
+        renderer = self.renderer
+        for sprite in self.sim.all_sprites:
+            renderer.draw_sprite(sprite, self.interpolate(sprite, alpha))
+        # Projectiles and particles move in straight lines, so step them back
+        renderer.draw_projectiles(self.sim.projectiles, self.projectile_images, alpha)
+        if self.sim.horde:
+            renderer.draw_horde(self.sim.horde, self.horde_image, alpha)
+        renderer.draw_group(self.sim.powerups)
+        renderer.draw_particles(self.particles, alpha)
+        renderer.draw_group(self.explosions)
+        renderer.draw_group(self.indicators)
         
         # Draw health bars and HUD
-        self.draw_health_bars(temp_surface)
-        self.draw_hud(temp_surface, remaining_time)
-        
-        # Apply screen shake
-        final_surface, offset = self.apply_screen_shake(temp_surface)
-        screen.blit(final_surface, offset)
-        
-        pygame.display.flip()
+        self.draw_health_bars(alpha)
+        self.draw_hud(remaining_time)
+        if self.show_profiler:
+            self.draw_profiler_overlay()
 
-    def draw_health_bars(self, surface):
+    def draw_health_bars(self, alpha=1.0):
         # Player health bar
-        self.draw_health_bar(surface, self.player.rect.centerx, 
-                            self.player.rect.top - 10,
+        x, y = self.interpolate(self.player, alpha)
+        self.draw_health_bar(x, y - self.player.rect.height // 2 - 10,
                             self.player.health, self.player.max_health, GREEN)
         
         # Shadow health bar
-        self.draw_health_bar(surface, self.shadow.rect.centerx,
-                            self.shadow.rect.top - 10,
-                            self.shadow.health, self.shadow.max_health, RED)
+        if self.shadow.alive():
+            x, y = self.interpolate(self.shadow, alpha)
+            self.draw_health_bar(x, y - self.shadow.rect.height // 2 - 10,
+                                self.shadow.health, self.shadow.max_health, RED)
 
-    def draw_health_bar(self, surface, x, y, health, max_health, color):
+    def draw_health_bar(self, x, y, health, max_health, color):
         bar_width = 50
         bar_height = 5
         fill = (health / max_health) * bar_width
         outline_rect = pygame.Rect(x - bar_width//2, y, bar_width, bar_height)
         fill_rect = pygame.Rect(x - bar_width//2, y, fill, bar_height)
-        pygame.draw.rect(surface, color, fill_rect)
-        pygame.draw.rect(surface, WHITE, outline_rect, 1)
+        self.renderer.draw_rect(color, fill_rect)
+        self.renderer.draw_rect(WHITE, outline_rect, 1)
 
-    def draw_hud(self, surface, remaining_time):
+    def draw_hud(self, remaining_time):
+        renderer = self.renderer
+        
         # Time
-        time_text = self.font.render(f"Time: {remaining_time}s", True, WHITE)
-        surface.blit(time_text, (10, 10))
+        self.draw_counter("Time: ", remaining_time, "s", (10, 10))
         
         # Score
-        score_text = self.font.render(f"Score: {self.player.score}", True, WHITE)
-        surface.blit(score_text, (WIDTH - 150, 10))
+        self.draw_counter("Score: ", self.player.score, "", (WIDTH - 150, 10))
         
         # Level
-        level_text = self.font.render(f"Level: {self.level}", True, WHITE)
-        surface.blit(level_text, (WIDTH//2 - level_text.get_width()//2, 10))
+        self.draw_counter("Level: ", self.level, "", (WIDTH//2, 10), centered=True)
+        
+        # Horde size
+        if self.sim.horde is not None:
+            self.draw_counter("Shadows: ", len(self.sim.horde), "", (WIDTH - 150, 40))
         
         # Energy bar
         energy_width = 200
         energy_height = 20
         energy_fill = (self.player.energy / self.player.max_energy) * energy_width
-        pygame.draw.rect(surface, BLUE, (10, HEIGHT - 30, energy_fill, energy_height))
-        pygame.draw.rect(surface, WHITE, (10, HEIGHT - 30, energy_width, energy_height), 2)
+        renderer.draw_rect(BLUE, (10, HEIGHT - 30, energy_fill, energy_height))
+        renderer.draw_rect(WHITE, (10, HEIGHT - 30, energy_width, energy_height), 2)
         
         # Shield bar if active
         if self.player.shield > 0:
             shield_width = 200
             shield_height = 10
             shield_fill = (self.player.shield / 100) * shield_width
-            pygame.draw.rect(surface, PURPLE, (10, HEIGHT - 50, shield_fill, shield_height))
-            pygame.draw.rect(surface, WHITE, (10, HEIGHT - 50, shield_width, shield_height), 2)
+            renderer.draw_rect(PURPLE, (10, HEIGHT - 50, shield_fill, shield_height))
+            renderer.draw_rect(WHITE, (10, HEIGHT - 50, shield_width, shield_height), 2)
 
         # Tutorial message
         if self.show_tutorial and self.level == 1:
-            tutorial_text = self.font.render(
-                self.tutorial_messages[self.tutorial_index], True, WHITE)
-            surface.blit(tutorial_text, 
-                        (WIDTH//2 - tutorial_text.get_width()//2, 50))
+            tutorial_text = self.text.render(
+                self.font, self.tutorial_messages[self.tutorial_index], WHITE)
+            self.hud_blit(tutorial_text, (WIDTH//2 - tutorial_text.get_width()//2, 50))
+
+    def draw_counter(self, label, value, suffix, position, centered=False):
+        """Draw label, number and suffix with the number built from cached glyphs"""
+        label_text = self.text.render(self.font, label, WHITE)
+        suffix_text = self.text.render(self.font, suffix, WHITE)
+        digits = self.text.atlas(self.font, WHITE)
+        number = str(int(value))
+        x, y = position
+        if centered:
+            width = label_text.get_width() + digits.width(number) + suffix_text.get_width()
+            x -= width // 2
+        self.hud_blit(label_text, (x, y))
+        x = digits.draw(self.hud_blit, number, (x + label_text.get_width(), y))
+        self.hud_blit(suffix_text, (x, y))
+
+    def draw_profiler_overlay(self):
+        # Percentiles are refreshed twice a second to keep the overlay cheap
+        if self.profiler.frame % 30 == 0 or not self.profiler_lines:
+            self.profiler_lines = ["phase          p50    p95    p99 (ms)"]
+            for key, (p50, p95, p99) in self.profiler.summary().items():
+                self.profiler_lines.append(
+                    f"{key[:-3]:<12} {p50:6.2f} {p95:6.2f} {p99:6.2f}")
+            counts = self.profiler.history[-1] if self.profiler.history else {}
+            self.profiler_lines.append("  ".join(
+                f"{name}: {counts.get(name, 0)}"
+                for name in ("projectiles", "particles", "powerups")))
+            quality = self.quality.summary()
+            self.profiler_lines.append(
+                f"quality: {quality['level']}  load {quality['load']:.0%} of "
+                f"{quality['budget_ms']:.1f} ms  changes {quality['changes']}")
+            pacing = self.pacing.summary()
+            self.profiler_lines.append(
+                f"pacing: {pacing['fps']:.0f} fps  jitter {pacing['jitter_ms']:.1f} ms  "
+                f"worst {pacing['worst_ms']:.1f} ms  {pacing['ticks_per_frame']:.2f} ticks/frame  "
+                f"dropped {self.timestep.dropped}")
+        for i, line in enumerate(self.profiler_lines):
+            self.hud_blit(self.text.render(self.small_font, line, GREEN), (10, 80 + i * 16))
 
     def show_game_over(self):
         screen.fill(BLACK)
-        game_over_text = self.title_font.render("Game Over!", True, WHITE)
-        score_text = self.font.render(f"Final Score: {self.player.score}", True, WHITE)
-        level_text = self.font.render(f"Final Level: {self.level}", True, WHITE)
+        game_over_text = self.text.render(self.title_font, "Game Over!", WHITE)
+        score_text = self.text.render(self.font, f"Final Score: {self.player.score}", WHITE)
+        level_text = self.text.render(self.font, f"Final Level: {self.level}", WHITE)
         
         screen.blit(game_over_text, (WIDTH//2 - game_over_text.get_width()//2, HEIGHT//3))
         screen.blit(score_text, (WIDTH//2 - score_text.get_width()//2, HEIGHT//2))
         screen.blit(level_text, (WIDTH//2 - level_text.get_width()//2, HEIGHT*2//3))
         
-        pygame.display.flip()
-        pygame.time.wait(2000)
+        flip_display()
 
     def show_pause_menu(self):
+        if self.paused_frame is not None:
+            screen.blit(self.paused_frame, (0, 0))
         overlay = pygame.Surface((WIDTH, HEIGHT))
         overlay.fill(BLACK)
         overlay.set_alpha(128)
         screen.blit(overlay, (0, 0))
         
-        pause_text = self.title_font.render("PAUSED", True, WHITE)
-        continue_text = self.font.render("Press P to Continue", True, WHITE)
-        quit_text = self.font.render("Press Q to Quit", True, WHITE)
+        pause_text = self.text.render(self.title_font, "PAUSED", WHITE)
+        continue_text = self.text.render(self.font, "Press P to Continue", WHITE)
+        quit_text = self.text.render(self.font, "Press Q to Quit", WHITE)
         
         screen.blit(pause_text, (WIDTH//2 - pause_text.get_width()//2, HEIGHT//3))
         screen.blit(continue_text, (WIDTH//2 - continue_text.get_width()//2, HEIGHT//2))
         screen.blit(quit_text, (WIDTH//2 - quit_text.get_width()//2, HEIGHT*2//3))
         
-        pygame.display.flip()
-
-    def get_level_config(self):
-        """Return configuration for current level"""
-        if self.level == 1:  # Tutorial level
-            return {
-                "shadow_health": 50,
-                "shadow_speed": 2,
-                "shadow_damage": 3,
-                "time_limit": 240,
-                "powerup_frequency": 0.005
-            }
-        elif self.level == 2:
-            return {
-                "shadow_health": 100,
-                "shadow_speed": 3,
-                "shadow_damage": 5,
-                "time_limit": 180,
-                "powerup_frequency": 0.01
-            }
-        else:
-            return {
-                "shadow_health": 100 + (self.level - 2) * 30,
-                "shadow_speed": 3 + (self.level - 2) * 0.3,
-                "shadow_damage": 5 + (self.level - 2) * 1,
-                "time_limit": max(120, 180 - (self.level - 2) * 10),
-                "powerup_frequency": min(0.02, 0.01 + (self.level - 2) * 0.002)
-            }
+        flip_display()
 
     def show_upgrade_menu(self):
-        choosing = True
-        while choosing:
-            screen.fill(BLACK)
-            
-            title = self.title_font.render(f"Level {self.level} Complete!", True, WHITE)
-            subtitle = self.font.render("Choose an upgrade:", True, WHITE)
-            
-            options = [
-                f"Max Health (+20) [Level {self.player.upgrades['max_health']}/5]",
-                f"Max Energy (+20) [Level {self.player.upgrades['max_energy']}/5]",
-                f"Speed (+0.5) [Level {self.player.upgrades['speed']}/5]",
-                f"Damage (+20%) [Level {self.player.upgrades['damage']}/5]"
-            ]
-            
-            screen.blit(title, (WIDTH//2 - title.get_width()//2, 100))
-            screen.blit(subtitle, (WIDTH//2 - subtitle.get_width()//2, 200))
-            
-            for i, text in enumerate(options):
-                color = WHITE if self.player.upgrades[list(self.player.upgrades.keys())[i]] < 5 else RED
-                option_text = self.font.render(text, True, color)
-                screen.blit(option_text, (WIDTH//2 - option_text.get_width()//2, 300 + i * 50))
-            
-            pygame.display.flip()
-            
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    return False
-                if event.type == pygame.KEYDOWN:
-                    if event.key in [pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4]:
-                        stat = list(self.player.upgrades.keys())[event.key - pygame.K_1]
-                        if self.player.upgrades[stat] < 5:
-                            self.player.upgrade(stat)
-                            choosing = False
-                            return True
-        return True
+        screen.fill(BLACK)
+        
+        title = self.text.render(self.title_font, f"Level {self.level} Complete!", WHITE)
+        subtitle = self.text.render(self.font, "Choose an upgrade:", WHITE)
+        
+        options = [
+            f"Max Health (+20) [Level {self.player.upgrades['max_health']}/5]",
+            f"Max Energy (+20) [Level {self.player.upgrades['max_energy']}/5]",
+            f"Speed (+0.5) [Level {self.player.upgrades['speed']}/5]",
+            f"Damage (+20%) [Level {self.player.upgrades['damage']}/5]"
+        ]
+        
+        screen.blit(title, (WIDTH//2 - title.get_width()//2, 100))
+        screen.blit(subtitle, (WIDTH//2 - subtitle.get_width()//2, 200))
+        
+        for i, text in enumerate(options):
+            color = WHITE if self.player.upgrades[list(self.player.upgrades.keys())[i]] < 5 else RED
+            option_text = self.text.render(self.font, text, color)
+            screen.blit(option_text, (WIDTH//2 - option_text.get_width()//2, 300 + i * 50))
+        
+        flip_display()
 
     def create_screen_shake(self):
+        # Shaking redraws the whole screen, so low quality turns it off
+        if self.quality.level.shake <= 0:
+            return
         self.screen_shake = 20  # Duration of shake
-        self.shake_intensity = 5  # Maximum pixel offset
+        self.shake_intensity = 5 * self.quality.level.shake  # Maximum pixel offset
 
-    def apply_screen_shake(self, surface):
+    def apply_screen_shake(self):
+        """Return this frame's camera offset (the shake counts down per tick)"""
         if hasattr(self, 'screen_shake') and self.screen_shake > 0:
-            self.screen_shake -= 1
             intensity = self.shake_intensity * (self.screen_shake / 20)
-            offset_x = random.randint(-int(intensity), int(intensity))
-            offset_y = random.randint(-int(intensity), int(intensity))
-            return surface.copy(), (offset_x, offset_y)
-        return surface, (0, 0)
-
-    def create_trail(self, pos, color):
-        for _ in range(3):
-            offset_x = random.randint(-5, 5)
-            offset_y = random.randint(-5, 5)
-            particle = Particle(pos[0] + offset_x, pos[1] + offset_y, color)
-            particle.velocity = [x * 0.5 for x in particle.velocity]
-            self.particles.add(particle)
+            offset_x = self.shake_rng.randint(-int(intensity), int(intensity))
+            offset_y = self.shake_rng.randint(-int(intensity), int(intensity))
+            return (offset_x, offset_y)
+        return (0, 0)
+
+    def create_trail(self, pos, color, amount=3):
+        self.particles.emit(pos[0], pos[1], color, self.quality.scale(amount),
+                            speed=0.5, jitter=5)
+
+    def load_sounds(self, effects=None):
+        """Build the sound effects, e.g. again after tuning create_sounds"""
+        try:
+            sounds = create_sounds.SoundBank().load(effects or create_sounds.EFFECTS)
+        except Exception as e:
+            print(f"Error loading sounds: {e}")
+            return
+        volume = 0.3  # 30% volume
+        if self.sounds:
+            volume = next(iter(self.sounds.values())).get_volume()
+        for sound in sounds.values():
+            sound.set_volume(volume)
+        self.sounds = sounds
 
     def create_explosion(self, x, y):
-        if 'explosion' in self.sounds:
-            self.sounds['explosion'].play()
-        self.explosions.add(Explosion(x, y))
+        self.audio.play('explosion')
+        explosion = Explosion(x, y, self.effect_clock, self.quality.level.explosion_step)
+        self.explosions.add(explosion)
+        self.effect_clock.schedule(explosion.lifetime, explosion.kill)
 
     def set_volume(self, volume):
         """Set volume for all sounds (0.0 to 1.0)"""
         try:
             for sound in self.sounds.values():
                 sound.set_volume(volume)
-            pygame.mixer.music.set_volume(volume)
+            self.audio.mute(volume <= 0)
+            if self.music is not None:
+                self.music.set_volume(volume)
         except:
             pass
 
     def toggle_sound(self):
         """Toggle all game sounds on/off"""
-        try:
-            if pygame.mixer.music.get_volume() > 0:
-                self.set_volume(0.0)
-            else:
-                self.set_volume(0.5)
-        except:
-            pass
+        # Tracked here, since the music may have failed to start
+        self.muted = not self.muted
+        self.set_volume(0.0 if self.muted else 0.5)
 
-def create_game_sprites():
-    """Create and save all game sprites"""
+def create_game_sprites(atlas=True):
+    """Create and save all game sprites, optionally packed into an atlas too"""
     if not os.path.exists("assets"):
         os.makedirs("assets")
         
@@ -970,13 +1574,15 @@ def create_game_sprites():
     
     # Create and save all sprites
     try:
+        sprites = {}
+        
         # Main sprites
-        pygame.image.save(create_crystal(64, SPRITE_COLORS['player']), "assets/player.png")
-        pygame.image.save(create_crystal(64, SPRITE_COLORS['shadow']), "assets/shadow.png")
+        sprites["player.png"] = create_crystal(64, SPRITE_COLORS['player'])
+        sprites["shadow.png"] = create_crystal(64, SPRITE_COLORS['shadow'])
         
         # Projectiles
-        pygame.image.save(create_projectile(32, SPRITE_COLORS['player']), "assets/player_projectile.png")
-        pygame.image.save(create_projectile(32, SPRITE_COLORS['shadow']), "assets/shadow_projectile.png")
+        sprites["player_projectile.png"] = create_projectile(32, SPRITE_COLORS['player'])
+        sprites["shadow_projectile.png"] = create_projectile(32, SPRITE_COLORS['shadow'])
         
         # Powerups
         powerup_colors = {
@@ -988,11 +1594,18 @@ def create_game_sprites():
         }
         
         for name, colors in powerup_colors.items():
-            pygame.image.save(create_powerup(48, colors), f"assets/{name}_powerup.png")
+            sprites[f"{name}_powerup.png"] = create_powerup(48, colors)
         
         # Explosion frames
         for i in range(8):
-            pygame.image.save(create_explosion_frame(i, 8), f"assets/explosion_{i}.png")
+            sprites[f"explosion_{i}.png"] = create_explosion_frame(i, 8)
+        
+        for name, surface in sprites.items():
+            pygame.image.save(surface, os.path.join("assets", name))
+        
+        # One atlas image plus a manifest of where each sprite sits in it
+        if atlas:
+            save_atlas(sprites, "assets")
             
         print("Game sprites created successfully!")
         
@@ -1000,5 +1613,39 @@ def create_game_sprites():
         print(f"Error creating sprites: {e}")
 
 if __name__ == "__main__":
-    game = Game()
+    import argparse
+    parser = argparse.ArgumentParser(description="Shadow Self")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="write per-frame timings to a .csv or .json file on exit")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record each match's input to PATH for replay.py")
+    parser.add_argument("--seed", type=int, help="seed for every random stream")
+    parser.add_argument("--horde", action="store_true",
+                        help="fight waves of lesser shadows alongside your shadow")
+    parser.add_argument("--target-fps", type=int, default=60,
+                        help="frame rate the effect quality is adjusted to hold")
+    parser.add_argument("--quality", choices=["auto"] + [level.name for level in QUALITY_LEVELS],
+                        default="auto", help="fix the effect quality instead of adapting it")
+    parser.add_argument("--render-scale", type=float, default=1.0,
+                        help="draw the game at this fraction of 800x600 and scale it up")
+    parser.add_argument("--window", metavar="WxH",
+                        help="window size; the game is scaled to fit")
+    parser.add_argument("--fullscreen", action="store_true", help="scale the game to the screen")
+    parser.add_argument("--low-res-hud", action="store_true",
+                        help="draw HUD text at the render scale too")
+    parser.add_argument("--gpu", action="store_true",
+                        help="draw with SDL renderer textures instead of surface blits "
+                             "(SDL_RENDER_DRIVER=software forces the CPU renderer)")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print how long each startup stage took on exit")
+    args = parser.parse_args()
+    window_size = tuple(int(side) for side in args.window.split("x")) if args.window else None
+    game = Game(profile_path=args.profile, seed=args.seed, record_path=args.record,
+                horde=args.horde, target_fps=args.target_fps,
+                adaptive_quality=args.quality == "auto", render_scale=args.render_scale,
+                window_size=window_size, fullscreen=args.fullscreen,
+                native_hud=not args.low_res_hud, gpu=args.gpu,
+                startup_report=args.startup_report)
+    if args.quality != "auto":
+        game.quality.set_level(args.quality)
     game.run()
@@ -0,0 +1,111 @@
+import json
+import os
+import pygame
+
+ATLAS_IMAGE = "atlas.png"
+ATLAS_MANIFEST = "atlas.json"
+
+class AssetManager:
+    """Loads each image once and shares it between every user
+
+    Images are converted to the display pixel format as soon as a window
+    exists (or by convert_all() once it opens), so blits skip per-pixel
+    format conversion.  If the assets folder holds a packed atlas, sprites
+    listed in its manifest are served as subsurfaces of the atlas instead
+    of being read from their own files.
+    """
+    def __init__(self, root="assets"):
+        self.root = root
+        self.images = {}
+        self.atlas = None
+        self.regions = {}
+        self.atlas_checked = False
+        self.fallback = None
+
+    def load(self, name, scale=1):
+        """Return a shared image, raising if it cannot be loaded"""
+        key = (name, scale)
+        image = self.images.get(key)
+        if image is None:
+            if scale != 1:
+                image = self.load(name)
+                image = self.convert(pygame.transform.scale(image,
+                                                            (image.get_width() * scale,
+                                                             image.get_height() * scale)))
+            else:
+                image = self.find(name)
+            self.images[key] = image
+        return image
+
+    def image(self, name, scale=1):
+        """Like load() but fall back to a plain white square"""
+        try:
+            return self.load(name, scale)
+        except Exception:
+            if self.fallback is None:
+                self.fallback = pygame.Surface((30, 30))
+                self.fallback.fill((255, 255, 255))
+            return self.fallback
+
+    def find(self, name):
+        if not self.atlas_checked:
+            self.atlas_checked = True
+            manifest = os.path.join(self.root, ATLAS_MANIFEST)
+            if os.path.exists(manifest):
+                self.load_atlas(manifest)
+        if name in self.regions:
+            return self.atlas.subsurface(self.regions[name])
+        return self.convert(pygame.image.load(os.path.join(self.root, name)))
+
+    def load_atlas(self, manifest):
+        with open(manifest) as file:
+            data = json.load(file)
+        atlas = pygame.image.load(os.path.join(self.root, data["image"]))
+        self.atlas = self.convert(atlas)
+        self.regions = {name: pygame.Rect(rect) for name, rect in data["sprites"].items()}
+
+    def convert(self, image):
+        if pygame.display.get_surface() is None:
+            return image
+        if image.get_flags() & pygame.SRCALPHA or image.get_alpha() is not None:
+            return image.convert_alpha()
+        return image.convert()
+
+    def convert_all(self):
+        """Convert everything loaded before the window opened"""
+        if self.atlas is not None:
+            self.atlas = self.convert(self.atlas)
+        for key, image in self.images.items():
+            if key[0] in self.regions and key[1] == 1:
+                self.images[key] = self.atlas.subsurface(self.regions[key[0]])
+            else:
+                self.images[key] = self.convert(image)
+
+def pack_atlas(sprites, width=512, padding=1):
+    """Pack named surfaces onto one image with simple shelf packing
+
+    Returns the atlas surface and a manifest mapping each name to its
+    [x, y, w, h] rect.
+    """
+    order = sorted(sprites, key=lambda name: sprites[name].get_height(), reverse=True)
+    regions = {}
+    x = y = shelf_height = 0
+    for name in order:
+        w, h = sprites[name].get_size()
+        if x + w > width:
+            x = 0
+            y += shelf_height + padding
+            shelf_height = 0
+        regions[name] = [x, y, w, h]
+        x += w + padding
+        shelf_height = max(shelf_height, h)
+    atlas = pygame.Surface((width, y + shelf_height), pygame.SRCALPHA)
+    for name, (x, y, w, h) in regions.items():
+        atlas.blit(sprites[name], (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+    return atlas, regions
+
+def save_atlas(sprites, root="assets"):
+    atlas, regions = pack_atlas(sprites)
+    pygame.image.save(atlas, os.path.join(root, ATLAS_IMAGE))
+    with open(os.path.join(root, ATLAS_MANIFEST), "w") as file:
+        json.dump({"image": ATLAS_IMAGE, "sprites": regions}, file, indent=2)
@@ -0,0 +1,131 @@
+import time
+import pygame
+
+# Mixer channels set aside for each category of effect
+CATEGORIES = {
+    "weapons": 3,
+    "impacts": 4,
+    "pickups": 1
+}
+
+# Category and most simultaneous instances of each effect
+VOICES = {
+    "shoot": ("weapons", 2),
+    "hit": ("impacts", 2),
+    "explosion": ("impacts", 3),
+    "powerup": ("pickups", 1)
+}
+
+class Voice:
+    """One reserved mixer channel and what was last started on it"""
+    def __init__(self, channel):
+        self.channel = channel
+        self.name = None
+        self.started = 0.0
+        self.length = 0.0
+        self.volume = 0.0
+
+    def busy(self):
+        return self.name is not None and self.channel.get_busy()
+
+    def loudness(self, now):
+        # Effects fade out, so a voice is about as loud as the part left to play
+        if self.length <= 0:
+            return 0.0
+        return self.volume * max(0.0, 1 - (now - self.started) / self.length)
+
+class AudioManager:
+    """Plays sound effects on a fixed pool of reserved mixer channels
+
+    Each category of effect (CATEGORIES) gets its own channels, and each
+    effect (VOICES) may only play so many times at once.  play() only
+    notes a request; flush(), once a frame, starts each requested effect
+    once however often it was triggered in between.  When an effect is at
+    its limit, or its category has no free channel, the quietest of the
+    voices it could use (or the oldest, with steal="oldest") is cut off
+    and reused.  Channels below first_channel (the music's) are left alone.
+    """
+    def __init__(self, categories=CATEGORIES, voices=VOICES, first_channel=1, steal="quietest"):
+        self.voices = voices
+        self.steal = steal
+        self.pending = {}
+        self.pools = {}
+        self.muted = False
+        self.played = 0
+        self.merged = 0
+        self.stolen = 0
+        if not pygame.mixer.get_init():
+            return
+        total = first_channel + sum(categories.values())
+        if pygame.mixer.get_num_channels() < total:
+            pygame.mixer.set_num_channels(total)
+        # Sound.play() never picks a reserved channel, so the pools stay ours
+        pygame.mixer.set_reserved(total)
+        index = first_channel
+        for category, count in categories.items():
+            self.pools[category] = [Voice(pygame.mixer.Channel(i))
+                                    for i in range(index, index + count)]
+            index += count
+
+    def play(self, name):
+        """Ask for an effect to start at the next flush()"""
+        self.pending[name] = self.pending.get(name, 0) + 1
+
+    def flush(self, sounds):
+        """Start the effects requested since the last flush"""
+        if not self.pending:
+            return
+        now = time.perf_counter()
+        for name, count in self.pending.items():
+            sound = sounds.get(name)
+            category, limit = self.voices.get(name, (None, 1))
+            pool = self.pools.get(category)
+            # Muted sounds cost nothing
+            if sound is None or not pool or sound.get_volume() <= 0 or self.muted:
+                continue
+            self.merged += count - 1
+            voice = self.pick(pool, name, limit, now)
+            voice.channel.play(sound)
+            voice.name = name
+            voice.started = now
+            voice.length = sound.get_length()
+            voice.volume = sound.get_volume()
+            self.played += 1
+        self.pending.clear()
+
+    def pick(self, pool, name, limit, now):
+        """A free voice for name, or the one to steal"""
+        busy = [voice for voice in pool if voice.busy()]
+        same = [voice for voice in busy if voice.name == name]
+        if len(same) < limit:
+            for voice in pool:
+                if not voice.busy():
+                    return voice
+            candidates = busy
+        else:
+            candidates = same
+        self.stolen += 1
+        if self.steal == "oldest":
+            return min(candidates, key=lambda voice: voice.started)
+        return min(candidates, key=lambda voice: voice.loudness(now))
+
+    def mute(self, muted=True):
+        """Silence every effect voice, cutting off the ones playing"""
+        self.muted = muted
+        if muted:
+            self.stop()
+
+    def stop(self):
+        self.pending.clear()
+        for pool in self.pools.values():
+            for voice in pool:
+                voice.channel.stop()
+                voice.name = None
+
+    def summary(self):
+        return {
+            "played": self.played,
+            "merged": self.merged,
+            "stolen": self.stolen,
+            "busy": sum(voice.busy() for pool in self.pools.values() for voice in pool)
+        }
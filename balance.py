@@ -0,0 +1,196 @@
+"""Headless balance sweeps over the level configuration
+
+Runs many matches of one level against a scripted bot on every CPU core
+and reports win rate, time-to-kill and damage taken for each combination
+of level, config scaling and upgrade build.  Matches plan the shadow
+without a time budget (planner_budget_ms=None), so a sweep gives the
+same results however many workers share the CPU.
+
+    python balance.py --levels 1 2 3 --matches 50
+    python balance.py --levels 3 --health 0.8 1 1.2 --damage 1 1.5 \\
+        --upgrades none damage max_health,speed --output sweep.csv
+"""
+import argparse
+import csv
+import itertools
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import Shadow
+
+# Keep this far from the shadow while strafing around it
+PREFERRED_RANGE = 220
+
+class Bot:
+    """Scripted player: keeps its distance, strafes, dodges and fires"""
+    def __init__(self, rng):
+        self.rng = rng
+        self.strafe = 1
+        self.strafe_timer = 0
+
+    def __call__(self, sim):
+        player, shadow = sim.player, sim.shadow
+        px, py = player.rect.center
+        sx, sy = shadow.rect.center
+        dx, dy = sx - px, sy - py
+        dist = math.hypot(dx, dy) or 1
+
+        # Circle the shadow at range, switching direction now and then
+        self.strafe_timer -= 1
+        if self.strafe_timer <= 0:
+            self.strafe = -self.strafe
+            self.strafe_timer = self.rng.randint(40, 120)
+        move_x = -dy / dist * self.strafe
+        move_y = dx / dist * self.strafe
+        closing = (dist - PREFERRED_RANGE) / PREFERRED_RANGE
+        move_x += dx / dist * closing
+        move_y += dy / dist * closing
+
+        # Step away from the closest incoming shadow projectile
+        threat = self.nearest_threat(sim, player.rect)
+        if threat is not None:
+            move_x += (px - threat[0]) / 40
+            move_y += (py - threat[1]) / 40
+
+        # Drift back towards the middle near the walls
+        move_x += (Shadow.WIDTH / 2 - px) / Shadow.WIDTH
+        move_y += (Shadow.HEIGHT / 2 - py) / Shadow.HEIGHT
+
+        return Shadow.InputState(left=move_x < -0.3, right=move_x > 0.3,
+                                 up=move_y < -0.3, down=move_y > 0.3,
+                                 dash=threat is not None and threat[2] < 40,
+                                 shoot=True, aim=(sx, sy))
+
+    def nearest_threat(self, sim, rect):
+        projectiles = sim.projectiles
+        nearby = sim.grid.query_points(rect.inflate(160, 160), "projectiles")
+        if len(nearby) == 0:
+            return None
+        nearby = nearby[projectiles.owner[nearby] == Shadow.SHADOW]
+        if len(nearby) == 0:
+            return None
+        offsets = projectiles.pos[nearby] - rect.center
+        dists = np.hypot(offsets[:, 0], offsets[:, 1])
+        i = int(dists.argmin())
+        x, y = projectiles.pos[nearby[i]]
+        return float(x), float(y), float(dists[i])
+
+def scaled_config(level, scales):
+    config = Shadow.level_config(level)
+    # Scale the damage the game's shadow shots really do, not the table's
+    config["shadow_damage"] = Shadow.SHADOW_SHOT_DAMAGE
+    for key, scale in scales.items():
+        config[key] = config[key] * scale
+    return config
+
+def run_match(task):
+    """Play one match of task["level"] and return its result"""
+    level, scales, build, seed = task["level"], task["scales"], task["build"], task["seed"]
+    # The planner's clock cutoff would make results depend on CPU load
+    sim = Shadow.Simulation(level=level, seed=seed, config=scaled_config(level, scales),
+                            planner_budget_ms=None)
+    for stat in build:
+        sim.player.upgrade(stat)
+    bot = Bot(sim.random.stream("bot"))
+    start_health = sim.player.health
+    while sim.outcome is None:
+        sim.step(bot(sim))
+    return {
+        "win": sim.outcome == "level_complete",
+        "seconds": sim.time_ms / 1000,
+        "damage_taken": sim.damage_taken,
+        "health_left": max(0, sim.player.health) / start_health
+    }
+
+def parse_build(text):
+    if text == "none":
+        return ()
+    build = tuple(text.split(","))
+    for stat in build:
+        if stat not in ("max_health", "max_energy", "speed", "damage"):
+            raise argparse.ArgumentTypeError(f"unknown upgrade: {stat}")
+    return build
+
+def build_tasks(args):
+    cells = []
+    for level, health, speed, damage, build in itertools.product(
+            args.levels, args.health, args.speed, args.damage, args.upgrades):
+        scales = {"shadow_health": health, "shadow_speed": speed, "shadow_damage": damage}
+        cells.append((level, scales, build))
+    tasks = [{"cell": i, "level": level, "scales": scales, "build": build,
+              "seed": args.seed + i * args.matches + match}
+             for i, (level, scales, build) in enumerate(cells)
+             for match in range(args.matches)]
+    return cells, tasks
+
+def summarize(cells, tasks, results):
+    rows = []
+    by_cell = [[] for _ in cells]
+    for task, result in zip(tasks, results):
+        by_cell[task["cell"]].append(result)
+    for (level, scales, build), matches in zip(cells, by_cell):
+        wins = [match for match in matches if match["win"]]
+        rows.append({
+            "level": level,
+            "health": scales["shadow_health"],
+            "speed": scales["shadow_speed"],
+            "damage": scales["shadow_damage"],
+            "upgrades": ",".join(build) or "none",
+            "matches": len(matches),
+            "win_rate": len(wins) / len(matches),
+            "ttk_s": float(np.median([m["seconds"] for m in wins])) if wins else math.nan,
+            "damage_taken": float(np.mean([m["damage_taken"] for m in matches])),
+            "health_left": float(np.mean([m["health_left"] for m in matches]))
+        })
+    return rows
+
+def print_table(rows):
+    print(f"{'level':>5}{'health':>8}{'speed':>7}{'damage':>8}  {'upgrades':<22}"
+          f"{'win %':>7}{'ttk s':>8}{'dmg taken':>11}{'hp left':>9}")
+    for row in rows:
+        print(f"{row['level']:>5}{row['health']:>8.2f}{row['speed']:>7.2f}{row['damage']:>8.2f}"
+              f"  {row['upgrades']:<22}{row['win_rate'] * 100:>6.0f}%{row['ttk_s']:>8.1f}"
+              f"{row['damage_taken']:>11.1f}{row['health_left'] * 100:>8.0f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="Shadow Self balance sweeps")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 3, 4, 5])
+    parser.add_argument("--health", type=float, nargs="+", default=[1.0],
+                        help="shadow health scales to sweep")
+    parser.add_argument("--speed", type=float, nargs="+", default=[1.0],
+                        help="shadow speed scales to sweep")
+    parser.add_argument("--damage", type=float, nargs="+", default=[1.0],
+                        help="shadow damage scales to sweep")
+    parser.add_argument("--upgrades", type=parse_build, nargs="+", default=[()],
+                        help="upgrade builds, e.g. none damage,damage max_health,speed")
+    parser.add_argument("--matches", type=int, default=20, help="matches per combination")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", help="write the table to this CSV file")
+    args = parser.parse_args()
+
+    cells, tasks = build_tasks(args)
+    start = time.perf_counter()
+    # Matches are short, so hand them out in chunks to cut IPC overhead
+    chunksize = max(1, len(tasks) // (args.workers * 8))
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(run_match, tasks, chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+    rows = summarize(cells, tasks, results)
+    print_table(rows)
+    print(f"\n{len(tasks)} matches on {args.workers} workers in {elapsed:.1f}s")
+
+    if args.output:
+        with open(args.output, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+if __name__ == "__main__":
+    main()
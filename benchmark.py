@@ -0,0 +1,244 @@
+"""Scripted stress benchmarks for Shadow Self
+
+Each scenario boots a real Game under SDL's dummy video and audio drivers,
+drives it with scripted input for a fixed number of frames (one simulation
+tick per frame) and reports frames per second, frame time percentiles and
+peak memory.  Every scenario runs in its own process so peak memory is
+measured per scenario.
+
+    python benchmark.py --frames 600 --output results.json
+    python benchmark.py --output new.json --baseline results.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import Shadow
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+WARMUP_FRAMES = 30
+
+def make_unkillable(game):
+    # Keep the match running for the whole benchmark
+    game.sim.game_time = 10 ** 6
+    game.sim.shadow.health = game.sim.shadow.max_health = 10 ** 9
+    game.sim.player.health = game.sim.player.max_health = 10 ** 9
+
+class Scenario:
+    """Scripted setup, per-frame hook and input for one benchmark"""
+    name = ""
+    level = 1
+    horde = False
+
+    def setup(self, game):
+        make_unkillable(game)
+
+    def before_frame(self, game, frame):
+        pass
+
+    def inputs(self, frame):
+        return Shadow.InputState(aim=(400, 300))
+
+class Idle(Scenario):
+    name = "idle_arena"
+
+class DashTrails(Scenario):
+    name = "dash_trails"
+
+    def before_frame(self, game, frame):
+        player = game.sim.player
+        player.energy = player.max_energy
+        player.dash_cooldown = 0
+
+    def inputs(self, frame):
+        # Circle the arena, dashing whenever the cooldown allows
+        heading = (frame // 20) % 4
+        return Shadow.InputState(right=heading == 0, down=heading == 1,
+                                 left=heading == 2, up=heading == 3,
+                                 dash=True, aim=(400, 300))
+
+class SpreadFire(Scenario):
+    name = "max_level_spread_fire"
+    level = 10
+
+    def setup(self, game):
+        super().setup(game)
+        # The planner picks its own shots from level 6, which would override the spread
+        game.sim.shadow.planner = None
+
+    def before_frame(self, game, frame):
+        shadow = game.sim.shadow
+        shadow.attack_pattern = 1
+        shadow.pattern_timer = 0
+        game.sim.player.invulnerable_timer = 2
+
+class PowerUps(Scenario):
+    name = "fifty_powerups"
+
+    def before_frame(self, game, frame):
+        sim = game.sim
+        while len(sim.powerups) < 50:
+            x = random.randint(50, Shadow.WIDTH - 50)
+            y = random.randint(50, Shadow.HEIGHT - 50)
+            kind = random.choice(["health", "energy", "speed", "shield", "damage"])
+            sim.add_powerup(x, y, kind)
+
+    def inputs(self, frame):
+        heading = (frame // 45) % 4
+        return Shadow.InputState(right=heading == 0, down=heading == 1,
+                                 left=heading == 2, up=heading == 3, aim=(400, 300))
+
+class ChainedExplosions(Scenario):
+    name = "chained_explosions"
+
+    def before_frame(self, game, frame):
+        # A chain of five explosions every fourth frame, like rapid hits
+        if frame % 4 == 0:
+            x = random.randint(100, 700)
+            y = random.randint(100, 500)
+            for i in range(5):
+                game.create_explosion(x + i * 20, y)
+                game.create_particles(x + i * 20, y, Shadow.RED, 10)
+            game.create_screen_shake()
+
+class HordeWave(Scenario):
+    name = "horde_300"
+    horde = True
+
+    def setup(self, game):
+        super().setup(game)
+        sim = game.sim
+        sim.waves_left = 0
+        sim.horde.spawn(300, sim.horde_rng, health=10 ** 9, speed=2, damage=1)
+
+    def before_frame(self, game, frame):
+        game.sim.player.invulnerable_timer = 2
+
+    def inputs(self, frame):
+        return Shadow.InputState(shoot=True, aim=(400, 300))
+
+SCENARIOS = {scenario.name: scenario for scenario in
+             (Idle(), DashTrails(), SpreadFire(), PowerUps(), ChainedExplosions(), HordeWave())}
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def run_scenario(name, frames, dirty_rects=True, seed=1234):
+    """Run one scenario in this process and return its results"""
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    scenario = SCENARIOS[name]
+    random.seed(seed)
+    # Full effect quality throughout, so runs measure the same work
+    game = Shadow.Game(dirty_rects=dirty_rects, seed=seed, horde=scenario.horde,
+                       adaptive_quality=False)
+    game.sim.level = scenario.level
+    game.state = "playing"
+    game.start_match()
+    scenario.setup(game)
+
+    # One tick per frame regardless of how fast frames are produced
+    game.fixed_frame_ms = game.timestep.tick_ms
+    frame = 0
+    game.input_source = lambda: scenario.inputs(frame)
+
+    frame_times = []
+    for frame in range(WARMUP_FRAMES + frames):
+        scenario.before_frame(game, frame)
+        start = time.perf_counter_ns()
+        game.game_loop()
+        elapsed = time.perf_counter_ns() - start
+        if frame >= WARMUP_FRAMES:
+            frame_times.append(elapsed / 1e6)
+    game.close()
+
+    times = np.array(frame_times)
+    p50, p95, p99 = np.percentile(times, (50, 95, 99)).tolist()
+    return {
+        "frames": frames,
+        "fps": 1000 / times.mean(),
+        "mean_ms": float(times.mean()),
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "max_ms": float(times.max()),
+        "peak_rss_mb": peak_rss_mb(),
+        "phases": game.profiler.summary()
+    }
+
+def run_isolated(name, frames, dirty_rects):
+    # A fresh process per scenario keeps peak memory per scenario
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(run_scenario, name, frames, dirty_rects).result()
+
+def compare(results, baseline):
+    print()
+    print(f"{'scenario':<24}{'fps':>10}{'base':>10}{'change':>10}{'p95 ms':>10}{'base':>10}")
+    for name, result in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        change = (result["fps"] / base["fps"] - 1) * 100
+        print(f"{name:<24}{result['fps']:>10.1f}{base['fps']:>10.1f}{change:>+9.1f}%"
+              f"{result['p95_ms']:>10.2f}{base['p95_ms']:>10.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Shadow Self stress benchmarks")
+    parser.add_argument("--frames", type=int, default=600, help="timed frames per scenario")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="run only this scenario (repeatable)")
+    parser.add_argument("--full-redraw", action="store_true",
+                        help="clear and flip the whole frame instead of dirty rects")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a previous results file")
+    args = parser.parse_args()
+
+    import pygame
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "frames": args.frames,
+            "dirty_rects": not args.full_redraw,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S")
+        },
+        "scenarios": {}
+    }
+    print(f"{'scenario':<24}{'fps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak MB':>10}")
+    for name in args.scenario or SCENARIOS:
+        result = run_isolated(name, args.frames, not args.full_redraw)
+        results["scenarios"][name] = result
+        peak = result["peak_rss_mb"]
+        print(f"{name:<24}{result['fps']:>10.1f}{result['p50_ms']:>10.2f}"
+              f"{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+              f"{peak if peak is not None else math.nan:>10.1f}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            compare(results, json.load(file))
+
+if __name__ == "__main__":
+    main()
@@ -1,68 +1,156 @@
+"""Sound synthesis for Shadow Self
+
+Every sound effect is described by a SoundSpec and rendered with NumPy,
+all effects in one batch.  SoundBank turns the specs into
+pygame.mixer.Sound objects at startup, keeping each rendered effect in
+sounds/cache under a hash of its parameters and the sample rate, so only
+sounds whose parameters changed are synthesized again.  Music is
+streamed by music.MusicStreamer instead.
+
+Run as a script to write the effects to sounds/*.wav.
+"""
+import hashlib
+import io
+import json
+import os
+import wave
 import numpy as np
-from scipy.io import wavfile
-
-def create_shoot_sound():
-    sample_rate = 44100
-    duration = 0.1
-    t = np.linspace(0, duration, int(sample_rate * duration))
-    frequency = 440
-    waveform = np.sin(2 * np.pi * frequency * t) * np.exp(-10 * t)
-    waveform = np.int16(waveform * 32767)
-    wavfile.write('sounds/shoot.wav', sample_rate, waveform)
-
-def create_hit_sound():
-    sample_rate = 44100
-    duration = 0.1
-    t = np.linspace(0, duration, int(sample_rate * duration))
-    frequency = 220
-    waveform = np.sin(2 * np.pi * frequency * t) * np.exp(-20 * t)
-    waveform = np.int16(waveform * 32767)
-    wavfile.write('sounds/hit.wav', sample_rate, waveform)
-
-def create_powerup_sound():
-    sample_rate = 44100
-    duration = 0.2
-    t = np.linspace(0, duration, int(sample_rate * duration))
-    frequency = np.linspace(440, 880, len(t))
-    waveform = np.sin(2 * np.pi * frequency * t) * np.exp(-5 * t)
-    waveform = np.int16(waveform * 32767)
-    wavfile.write('sounds/powerup.wav', sample_rate, waveform)
-
-def create_explosion_sound():
-    sample_rate = 44100
-    duration = 0.3
-    t = np.linspace(0, duration, int(sample_rate * duration))
-    noise = np.random.normal(0, 1, len(t))
-    waveform = noise * np.exp(-10 * t)
-    waveform = np.int16(waveform * 32767)
-    wavfile.write('sounds/explosion.wav', sample_rate, waveform)
-
-def create_background_music():
-    sample_rate = 44100
-    duration = 10.0  # 10 seconds
-    t = np.linspace(0, duration, int(sample_rate * duration))
-    
-    # Create a simple melody
-    frequencies = [440, 523.25, 659.25, 783.99]  # A4, C5, E5, G5
-    waveform = np.zeros_like(t)
-    
-    for freq in frequencies:
-        waveform += np.sin(2 * np.pi * freq * t)
-    
-    # Add some harmonics
-    waveform += 0.5 * np.sin(4 * np.pi * frequencies[0] * t)
-    waveform += 0.25 * np.sin(6 * np.pi * frequencies[0] * t)
-    
-    # Normalize and convert to 16-bit integer
-    waveform = waveform / np.max(np.abs(waveform))
-    waveform = np.int16(waveform * 32767)
-    
-    wavfile.write('sounds/background.wav', sample_rate, waveform)
+import pygame
+
+SAMPLE_RATE = 44100
+CACHE_DIR = os.path.join("sounds", "cache")
+# Bump when synthesize() changes, so cached sounds are rendered again
+SYNTH_VERSION = 1
+
+class SoundSpec:
+    """Parameters of one synthesized effect
+
+    A sine tone starting at frequency, swept linearly to sweep (if given)
+    over the duration, mixed with noise (0 is a pure tone, 1 pure noise)
+    and faded out by exp(-decay * t).
+    """
+    def __init__(self, frequency=440.0, sweep=None, decay=10.0, noise=0.0, duration=0.1,
+                 volume=1.0):
+        self.frequency = frequency
+        self.sweep = sweep
+        self.decay = decay
+        self.noise = noise
+        self.duration = duration
+        self.volume = volume
+
+    def params(self):
+        return {"frequency": self.frequency, "sweep": self.sweep, "decay": self.decay,
+                "noise": self.noise, "duration": self.duration, "volume": self.volume}
+
+    def key(self, sample_rate=SAMPLE_RATE):
+        """Hash of everything that changes the rendered samples"""
+        data = json.dumps({"params": self.params(), "sample_rate": sample_rate,
+                           "version": SYNTH_VERSION}, sort_keys=True)
+        return hashlib.sha1(data.encode()).hexdigest()[:16]
+
+EFFECTS = {
+    "shoot": SoundSpec(frequency=440, decay=10, duration=0.1),
+    "hit": SoundSpec(frequency=220, decay=20, duration=0.1),
+    "powerup": SoundSpec(frequency=440, sweep=880, decay=5, duration=0.2),
+    "explosion": SoundSpec(noise=1.0, decay=10, duration=0.3)
+}
+
+def synthesize(specs, sample_rate=SAMPLE_RATE):
+    """Render every spec at once, returning one int16 array per spec"""
+    lengths = [int(spec.duration * sample_rate) for spec in specs]
+    t = np.arange(max(lengths)) / sample_rate
+
+    def column(values):
+        return np.array(values, dtype=np.float64)[:, None]
+
+    start = column([spec.frequency for spec in specs])
+    end = column([spec.frequency if spec.sweep is None else spec.sweep for spec in specs])
+    duration = column([spec.duration for spec in specs])
+    noise = column([spec.noise for spec in specs])
+
+    # Integrate the swept frequency so the phase stays continuous
+    frequency = start + (end - start) * np.minimum(t / duration, 1.0)
+    tone = np.sin(2 * np.pi * np.cumsum(frequency, axis=1) / sample_rate)
+    # Noise is seeded by the spec's key, so a cached sound renders the same again
+    hiss = np.stack([np.random.default_rng(int(spec.key(sample_rate), 16))
+                     .normal(0, 1, len(t)) for spec in specs])
+    waveform = (1 - noise) * tone + noise * hiss
+    waveform *= np.exp(-column([spec.decay for spec in specs]) * t)
+    waveform *= column([spec.volume for spec in specs])
+    samples = np.int16(np.clip(waveform, -1, 1) * 32767)
+    return [samples[i, :length] for i, length in enumerate(lengths)]
+
+def wav_bytes(samples, sample_rate=SAMPLE_RATE):
+    """Mono 16-bit WAV file contents for samples"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(sample_rate)
+        file.writeframes(samples.astype("<i2").tobytes())
+    return buffer.getvalue()
+
+class SoundBank:
+    """Synthesized effects as mixer Sounds, cached on disk by parameter hash
+
+    load() reads each effect's cached WAV if its parameters are unchanged
+    and renders the rest in one synthesize() batch, writing them back to
+    the cache and dropping the files they replace.  A cache that cannot
+    be written only costs the synthesis on the next start.
+    """
+    def __init__(self, cache_dir=CACHE_DIR, sample_rate=None):
+        self.cache_dir = cache_dir
+        self.sample_rate = sample_rate
+        self.synthesized = []
+        self.cached = []
+
+    def rate(self):
+        # Render at the mixer's rate so nothing is resampled on load
+        if self.sample_rate is not None:
+            return self.sample_rate
+        mixer = pygame.mixer.get_init()
+        return mixer[0] if mixer else SAMPLE_RATE
+
+    def path(self, name, key):
+        return os.path.join(self.cache_dir, f"{name}-{key}.wav")
+
+    def load(self, effects=EFFECTS):
+        """Return {name: pygame.mixer.Sound} for every effect"""
+        sample_rate = self.rate()
+        data = {}
+        missing = []
+        for name, spec in effects.items():
+            path = self.path(name, spec.key(sample_rate))
+            if os.path.exists(path):
+                with open(path, "rb") as file:
+                    data[name] = file.read()
+                self.cached.append(name)
+            else:
+                missing.append(name)
+        if missing:
+            rendered = synthesize([effects[name] for name in missing], sample_rate)
+            for name, samples in zip(missing, rendered):
+                data[name] = wav_bytes(samples, sample_rate)
+                self.store(name, effects[name].key(sample_rate), data[name])
+                self.synthesized.append(name)
+        return {name: pygame.mixer.Sound(file=io.BytesIO(data[name])) for name in effects}
+
+    def store(self, name, key, data):
+        """Write a rendered sound to the cache, replacing older versions"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for old in os.listdir(self.cache_dir):
+                if old.startswith(name + "-") and old.endswith(".wav"):
+                    os.remove(os.path.join(self.cache_dir, old))
+            with open(self.path(name, key), "wb") as file:
+                file.write(data)
+            return True
+        except OSError:
+            return False
 
 if __name__ == "__main__":
-    create_shoot_sound()
-    create_hit_sound()
-    create_powerup_sound()
-    create_explosion_sound()
-    create_background_music()
-    print("Sound files created successfully!") 
\ No newline at end of file
+    os.makedirs("sounds", exist_ok=True)
+    for (name, spec), samples in zip(EFFECTS.items(), synthesize(list(EFFECTS.values()))):
+        with open(os.path.join("sounds", f"{name}.wav"), "wb") as file:
+            file.write(wav_bytes(samples))
+    print("Sound files created successfully!")
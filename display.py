@@ -0,0 +1,224 @@
+import weakref
+import pygame
+from pygame._sdl2.video import Window, Renderer, Texture
+
+class ScaledDisplay:
+    """Window that shows the game drawn at a lower internal resolution
+
+    The game draws onto `world`, a surface render_scale times the game
+    size.  Presenting uploads only the changed rects into a streaming
+    texture that the GPU stretches onto the window, letterboxed to keep
+    the aspect ratio, so the software drawing cost follows the internal
+    resolution rather than the window size.  Menus draw onto `screen` at
+    the game size and are shown with show().  Images passed to overlay()
+    (HUD text) are drawn over the world from their own textures at the
+    game size, so they stay sharp at any internal resolution.
+
+    flip() and update(rects) stand in for pygame.display's, for use as a
+    DirtyRenderer output.  pygame only converts surfaces once a display
+    mode is set, and a window with a display surface cannot also have a
+    Renderer, so a hidden 1x1 display mode is opened next to the window.
+    """
+    def __init__(self, size, render_scale=1.0, window_size=None, fullscreen=False,
+                 title=""):
+        self.size = size
+        pygame.display.set_mode((1, 1), pygame.HIDDEN)
+        self.window = Window(title, size=window_size or size, resizable=True,
+                             fullscreen_desktop=fullscreen)
+        self.renderer = Renderer(self.window)
+        self.screen = pygame.Surface(size).convert()
+        self.screen_texture = Texture(self.renderer, size, streaming=True)
+        self.textures = weakref.WeakKeyDictionary()
+        self.overlays = []
+        self.set_scale(render_scale)
+
+    def set_scale(self, render_scale):
+        """Draw the world at render_scale times the game size from now on"""
+        self.render_scale = render_scale
+        world_size = (max(1, round(self.size[0] * render_scale)),
+                      max(1, round(self.size[1] * render_scale)))
+        self.world = pygame.Surface(world_size).convert()
+        self.world_texture = Texture(self.renderer, world_size, streaming=True)
+        self.world_rect = self.world.get_rect()
+
+    def viewport(self):
+        """The largest window rect with the game's aspect ratio, centered"""
+        window_width, window_height = self.window.size
+        zoom = min(window_width / self.size[0], window_height / self.size[1])
+        width, height = round(self.size[0] * zoom), round(self.size[1] * zoom)
+        return pygame.Rect((window_width - width) // 2, (window_height - height) // 2,
+                           width, height)
+
+    def to_game(self, position):
+        """Map a window position (e.g. the mouse) to game coordinates"""
+        viewport = self.viewport()
+        return (int((position[0] - viewport.x) * self.size[0] / viewport.width),
+                int((position[1] - viewport.y) * self.size[1] / viewport.height))
+
+    def overlay(self, image, position, area=None):
+        """Draw image at a game position over the next presented frame"""
+        if image.get_width() and image.get_height():
+            self.overlays.append((image, position, area))
+
+    def flip(self):
+        self.world_texture.update(self.world)
+        self.compose(self.world_texture)
+
+    def update(self, rects):
+        for rect in rects:
+            rect = rect.clip(self.world_rect)
+            if rect.width and rect.height:
+                self.world_texture.update(self.world.subsurface(rect), rect)
+        self.compose(self.world_texture)
+
+    def show(self, surface=None):
+        """Present a full game-size surface, such as a menu on screen"""
+        self.screen_texture.update(surface if surface is not None else self.screen)
+        self.overlays.clear()
+        self.compose(self.screen_texture)
+
+    def capture(self, frame=None):
+        """Copy the last world frame (or frame) onto screen, e.g. under a pause menu"""
+        pygame.transform.scale(frame if frame is not None else self.world, self.size,
+                               self.screen)
+
+    def compose(self, texture):
+        renderer = self.renderer
+        renderer.draw_color = (0, 0, 0, 255)
+        renderer.clear()
+        viewport = self.viewport()
+        texture.draw(dstrect=viewport)
+        zoom = viewport.width / self.size[0]
+        for image, (x, y), area in self.overlays:
+            area = pygame.Rect(area) if area is not None else image.get_rect()
+            self.texture(image).draw(
+                srcrect=area,
+                dstrect=(viewport.x + round(x * zoom), viewport.y + round(y * zoom),
+                         round(area.width * zoom), round(area.height * zoom)))
+        self.overlays.clear()
+        renderer.present()
+
+    def texture(self, image):
+        # Overlay images (cached text) are not changed after rendering
+        texture = self.textures.get(image)
+        if texture is None:
+            texture = self.textures[image] = Texture.from_surface(self.renderer, image)
+        return texture
+
+class TextureRenderer:
+    """DirtyRenderer stand-in that draws with the SDL renderer
+
+    Images are uploaded once as textures (shared through the display's
+    cache) and drawn into a render target of the display's world size,
+    which present() composes onto the window.  Sprites with a
+    RotationCache are drawn from the unrotated image rotated by the
+    renderer, and per-pixel alpha is blended by SDL.  Particles are
+    still written as pixels, into a transparent layer uploaded once per
+    frame, since thousands of single-square draws cost more than one
+    upload.  Works with any SDL render driver, the software one included.
+    """
+    def __init__(self, display, background=(0, 0, 0), scale=1.0):
+        self.display = display
+        self.renderer = display.renderer
+        self.background = background
+        self.offset = (0, 0)
+        self.set_surface(display.world, scale)
+
+    def set_surface(self, surface, scale=1.0):
+        """Draw at surface's size (the display's world) from the next frame"""
+        size = surface.get_size()
+        self.scale = scale
+        self.target = Texture(self.renderer, size, target=True)
+        self.particle_layer = pygame.Surface(size, pygame.SRCALPHA, 32)
+        self.particle_texture = Texture(self.renderer, size, streaming=True)
+        self.particle_texture.blend_mode = pygame.BLENDMODE_BLEND
+
+    def invalidate(self):
+        # Every frame is drawn in full
+        pass
+
+    def begin(self, offset=(0, 0)):
+        self.offset = offset
+        renderer = self.renderer
+        renderer.target = self.target
+        renderer.draw_color = pygame.Color(self.background)
+        renderer.clear()
+
+    def present(self):
+        self.renderer.target = None
+        self.display.compose(self.target)
+
+    def snapshot(self):
+        """Read the last drawn frame back from the GPU as a surface"""
+        self.renderer.target = self.target
+        frame = self.renderer.to_surface()
+        self.renderer.target = None
+        return frame
+
+    def mark_points(self, xs, ys, radius):
+        pass
+
+    def scaled(self, image):
+        return image
+
+    def dest(self, x, y, width, height):
+        # Game position (before the camera offset) to a target rect
+        scale = self.scale
+        return ((x + self.offset[0]) * scale, (y + self.offset[1]) * scale,
+                width * scale, height * scale)
+
+    def blit(self, image, position, area=None):
+        area = pygame.Rect(area) if area is not None else image.get_rect()
+        if area.width and area.height:
+            self.display.texture(image).draw(
+                srcrect=area, dstrect=self.dest(position[0], position[1], area.width, area.height))
+
+    def draw_rect(self, color, rect, width=0):
+        rect = pygame.Rect(rect)
+        self.renderer.draw_color = pygame.Color(color)
+        if width == 0:
+            self.renderer.fill_rect(self.dest(*rect))
+            return
+        for inset in range(width):
+            self.renderer.draw_rect(self.dest(*rect.inflate(-2 * inset, -2 * inset)))
+
+    def draw_group(self, group):
+        for sprite in group:
+            self.draw_sprite(sprite, sprite.rect.center)
+
+    def draw_sprite(self, sprite, center):
+        """Draw a sprite centered on center, rotating on the GPU if it rotates"""
+        rotations = getattr(sprite, "rotations", None)
+        if rotations is None:
+            image, angle = sprite.image, 0
+        else:
+            # transform.rotate turns counterclockwise, the renderer clockwise
+            image, angle = rotations.image, -sprite.angle
+        width, height = image.get_size()
+        dest = self.dest(center[0] - width / 2, center[1] - height / 2, width, height)
+        self.display.texture(image).draw(dstrect=dest, angle=angle)
+
+    def draw_projectiles(self, projectiles, images, alpha=1.0):
+        pos = projectiles.positions(alpha)
+        size = projectiles.size
+        half = size // 2
+        textures = {owner: self.display.texture(image) for owner, image in images.items()}
+        for owner, x, y in zip(projectiles.owner[:projectiles.count].tolist(),
+                               pos[:, 0].tolist(), pos[:, 1].tolist()):
+            textures[owner].draw(dstrect=self.dest(x - half, y - half, size, size))
+
+    def draw_horde(self, horde, image, alpha=1.0):
+        texture = self.display.texture(image)
+        size = horde.size
+        half = size // 2
+        for x, y in horde.positions(alpha).tolist():
+            texture.draw(dstrect=self.dest(x - half, y - half, size, size))
+
+    def draw_particles(self, particles, alpha=1.0):
+        if not len(particles):
+            return
+        layer = self.particle_layer
+        layer.fill((0, 0, 0, 0))
+        particles.draw(layer, self.offset, alpha, self.scale)
+        self.particle_texture.update(layer)
+        self.particle_texture.draw()
@@ -0,0 +1,252 @@
+import numpy as np
+
+# Movement patterns, cycled like Shadow.attack_pattern
+MIRROR, ORBIT, CHASE = 0, 1, 2
+PATTERN_TICKS = 180
+# Up to this many enemies the dense all-against-all tests beat the grid
+DENSE_LIMIT = 128
+
+class ShadowHorde:
+    """Hundreds of lesser shadows stored as NumPy arrays
+
+    Every enemy mirrors, orbits or chases the player (cycling patterns on
+    its own timer like the Shadow), is pushed apart from its neighbours so
+    the horde does not stack, stops `standoff` pixels short of the player
+    so it cannot pin it in place, and fires into the shared ProjectileStore.
+    Live enemies are packed at the front of the arrays.  Given a SpatialHash,
+    larger hordes find neighbours, shots and contacts through its "horde"
+    point layer instead of testing every enemy.
+    """
+    def __init__(self, bounds, capacity=512, size=24, orbit_radius=150,
+                 separation=1.0, standoff=48):
+        self.width, self.height = bounds
+        self.capacity = capacity
+        self.size = size
+        self.orbit_radius = orbit_radius
+        self.separation = separation
+        self.standoff = standoff
+        self.pos = np.zeros((capacity, 2), dtype=np.float64)
+        self.prev_pos = np.zeros((capacity, 2), dtype=np.float64)
+        self.health = np.zeros(capacity, dtype=np.float64)
+        self.speed = np.zeros(capacity, dtype=np.float64)
+        self.damage = np.zeros(capacity, dtype=np.float64)
+        self.pattern = np.zeros(capacity, dtype=np.int8)
+        self.pattern_timer = np.zeros(capacity, dtype=np.int32)
+        self.shoot_timer = np.zeros(capacity, dtype=np.int32)
+        self.shoot_delay = np.zeros(capacity, dtype=np.int32)
+        self.phase = np.zeros(capacity, dtype=np.float64)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def spawn(self, amount, rng, health, speed, damage, shoot_delay=(90, 180)):
+        """Bring amount enemies in from the arena edges (fewer if full)"""
+        amount = min(amount, self.capacity - self.count)
+        if amount <= 0:
+            return
+        start, end = self.count, self.count + amount
+        # Pick an edge per enemy and a random point along it
+        edge = rng.integers(0, 4, amount)
+        along = rng.random(amount)
+        x = np.where(edge < 2, along * self.width, np.where(edge == 2, 0, self.width))
+        y = np.where(edge >= 2, along * self.height, np.where(edge == 0, 0, self.height))
+        self.pos[start:end, 0] = x
+        self.pos[start:end, 1] = y
+        self.prev_pos[start:end] = self.pos[start:end]
+        self.health[start:end] = health
+        self.speed[start:end] = speed
+        self.damage[start:end] = damage
+        self.pattern[start:end] = rng.integers(0, 3, amount)
+        self.pattern_timer[start:end] = rng.integers(0, PATTERN_TICKS, amount)
+        self.shoot_delay[start:end] = rng.integers(shoot_delay[0], shoot_delay[1] + 1, amount)
+        self.shoot_timer[start:end] = rng.integers(0, shoot_delay[0], amount)
+        self.phase[start:end] = rng.random(amount) * 2 * np.pi
+        self.count = end
+
+    def empty(self):
+        self.count = 0
+
+    def insert(self, grid):
+        """Bucket the enemy centres into grid's "horde" point layer"""
+        n = self.count
+        grid.insert_points(self.pos[:n, 0], self.pos[:n, 1], "horde", self.size / 2)
+
+    def update(self, player_center, projectiles, owner, grid=None):
+        """Steer every enemy, fire due shots, return how many shots fired"""
+        n = self.count
+        if n == 0:
+            return 0
+        pos = self.pos[:n]
+        self.prev_pos[:n] = pos
+        px, py = player_center
+
+        timer = self.pattern_timer[:n]
+        timer += 1
+        switch = timer >= PATTERN_TICKS
+        self.pattern[:n][switch] = (self.pattern[:n][switch] + 1) % 3
+        timer[switch] = 0
+        pattern = self.pattern[:n]
+
+        # Steer towards each pattern's target
+        targets = np.empty((n, 2))
+        targets[:, 0] = px
+        targets[:, 1] = py
+        mirror = pattern == MIRROR
+        targets[mirror, 0] = self.width - px
+        orbit = pattern == ORBIT
+        angle = self.phase[:n][orbit] + timer[orbit] * 0.05
+        targets[orbit, 0] += np.cos(angle) * self.orbit_radius
+        targets[orbit, 1] += np.sin(angle) * self.orbit_radius
+        offset = targets - pos
+        dist = np.sqrt((offset ** 2).sum(axis=1))
+        speed = np.where(pattern == CHASE, self.speed[:n] * 1.5, self.speed[:n])
+        step = np.minimum(speed, dist) / np.maximum(dist, 1e-9)
+        pos += offset * step[:, None]
+
+        # Push apart enemies closer than one body width; the distance test
+        # runs in float32 and only the few close pairs get the full math
+        if n > 1 and self.separation:
+            i, j = self.close_pairs(grid)
+            if len(i):
+                delta = pos[i] - pos[j]
+                gap = np.sqrt((delta ** 2).sum(axis=1))
+                weight = (self.size - gap) / np.maximum(gap, 1e-9) / self.size
+                push = np.zeros((n, 2))
+                np.add.at(push, i, delta * weight[:, None])
+                pos += push * (self.speed[:n, None] * self.separation)
+
+        # Keep out of the player's personal space
+        offset = pos - (px, py)
+        dist = np.sqrt((offset ** 2).sum(axis=1))
+        inside = np.flatnonzero(dist < self.standoff)
+        if len(inside):
+            scale = self.standoff / np.maximum(dist[inside], 1e-9)
+            pos[inside] = (px, py) + offset[inside] * scale[:, None]
+
+        np.clip(pos[:, 0], 0, self.width, out=pos[:, 0])
+        np.clip(pos[:, 1], 0, self.height, out=pos[:, 1])
+
+        # Fire with the Shadow's shot patterns: single, spread or aimed
+        shoot_timer = self.shoot_timer[:n]
+        shoot_timer += 1
+        shooters = np.flatnonzero(shoot_timer >= self.shoot_delay[:n])
+        if len(shooters) == 0:
+            return 0
+        shoot_timer[shooters] = 0
+        kinds = pattern[shooters]
+        per_shot = np.where(kinds == ORBIT, 3, 1)
+        source = np.repeat(shooters, per_shot)
+        angles = np.zeros(len(source))
+        spread = np.repeat(kinds == ORBIT, per_shot)
+        angles[spread] = np.tile([-30.0, 0.0, 30.0], int(spread.sum()) // 3)
+        aimed = np.repeat(kinds == CHASE, per_shot)
+        angles[aimed] = np.degrees(np.arctan2(py - pos[source[aimed], 1],
+                                              px - pos[source[aimed], 0]))
+        projectiles.fire_batch(pos[source, 0], pos[source, 1], -1, angles, owner,
+                               self.damage[source])
+        return len(source)
+
+    def close_pairs(self, grid=None):
+        """Ordered (i, j) index pairs of enemies closer than one body width"""
+        n = self.count
+        x = self.pos[:n, 0].astype(np.float32)
+        y = self.pos[:n, 1].astype(np.float32)
+        if grid is None or n <= DENSE_LIMIT:
+            dx = x[:, None] - x[None, :]
+            dy = y[:, None] - y[None, :]
+            close = dx * dx + dy * dy < self.size * self.size
+            np.fill_diagonal(close, False)
+            return np.nonzero(close)
+        # Positions moved since the last broadphase, so bucket them again
+        self.insert(grid)
+        i, j = grid.query_points_batch(self.pos[:n, 0], self.pos[:n, 1], self.size / 2, "horde")
+        dx = x[i] - x[j]
+        dy = y[i] - y[j]
+        close = (dx * dx + dy * dy < self.size * self.size) & (i != j)
+        i, j = i[close], j[close]
+        # Same order as the dense test; a combined key sorts faster than lexsort
+        ordered = np.argsort(i * n + j)
+        return i[ordered], j[ordered]
+
+    def hits(self, projectiles, candidates, grid=None):
+        """Apply candidate projectiles that touch an enemy
+
+        Each projectile hits at most one enemy, the lowest-indexed one it
+        touches.  Returns the projectile indices that hit and the positions
+        of enemies that died.
+        """
+        n = self.count
+        if n == 0 or len(candidates) == 0:
+            return np.empty(0, dtype=np.intp), np.empty((0, 2))
+        reach = (self.size + projectiles.size) / 2
+        if grid is None or n <= DENSE_LIMIT:
+            offset = np.abs(projectiles.pos[candidates, None, :] - self.pos[None, :n, :])
+            touching = (offset < reach).all(axis=2)
+            hit = touching.any(axis=1)
+            shots = candidates[hit]
+            targets = touching[hit].argmax(axis=1)
+        else:
+            shot, enemy = grid.query_points_batch(projectiles.pos[candidates, 0],
+                                                  projectiles.pos[candidates, 1],
+                                                  projectiles.size / 2, "horde")
+            offset = np.abs(projectiles.pos[candidates[shot]] - self.pos[enemy])
+            touching = (offset < reach).all(axis=1)
+            shot, enemy = shot[touching], enemy[touching]
+            # Sorted by shot, then enemy, each shot's first pair is its target
+            ordered = np.argsort(shot * n + enemy)
+            shot, enemy = shot[ordered], enemy[ordered]
+            shot, first = np.unique(shot, return_index=True)
+            shots = candidates[shot]
+            targets = enemy[first]
+        if len(shots) == 0:
+            return np.empty(0, dtype=np.intp), np.empty((0, 2))
+        np.subtract.at(self.health, targets, projectiles.damage[shots])
+        dead = np.flatnonzero(self.health[:n] <= 0)
+        died = self.pos[dead].copy()
+        self.remove(dead)
+        return shots, died
+
+    def touching(self, rect, grid=None):
+        """Number of enemies overlapping rect"""
+        n = self.count
+        half = self.size / 2
+        if grid is None or n <= DENSE_LIMIT:
+            x = self.pos[:n, 0]
+            y = self.pos[:n, 1]
+        else:
+            nearby = grid.query_points(rect, "horde")
+            x = self.pos[nearby, 0]
+            y = self.pos[nearby, 1]
+        return int(((x - half < rect.right) & (x + half > rect.left) &
+                    (y - half < rect.bottom) & (y + half > rect.top)).sum())
+
+    def remove(self, indices):
+        if len(indices) == 0:
+            return
+        keep = np.ones(self.count, dtype=bool)
+        keep[indices] = False
+        keep = np.flatnonzero(keep)
+        k = len(keep)
+        for array in (self.pos, self.prev_pos, self.health, self.speed, self.damage,
+                      self.pattern, self.pattern_timer, self.shoot_timer,
+                      self.shoot_delay, self.phase):
+            array[:k] = array[keep]
+        self.count = k
+
+    def positions(self, alpha=1.0):
+        """Enemy positions alpha of the way from the last tick to this one"""
+        n = self.count
+        return self.prev_pos[:n] + (self.pos[:n] - self.prev_pos[:n]) * alpha
+
+    def draw(self, surface, image, offset=(0, 0), alpha=1.0, scale=1.0):
+        """Blit image at every enemy in one blits() call, return the positions
+
+        With scale the image must already be scaled to match.
+        """
+        pos = self.positions(alpha)
+        if self.count == 0:
+            return pos
+        topleft = ((pos - self.size // 2 + offset) * scale).astype(np.intp)
+        surface.blits([(image, position) for position in topleft.tolist()], doreturn=False)
+        return pos
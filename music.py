@@ -0,0 +1,120 @@
+import atexit
+from collections import deque
+import threading
+import time
+import numpy as np
+import pygame
+
+# A minor, F, C, G: a bar of each
+PROGRESSION = [
+    (220.00, 261.63, 329.63),
+    (174.61, 220.00, 261.63),
+    (261.63, 329.63, 392.00),
+    (196.00, 246.94, 293.66)
+]
+
+class MusicStreamer:
+    """Background music synthesized a chunk at a time on its own thread
+
+    The thread keeps a ring of at most `buffer_chunks` rendered chunks
+    (chunk_ms each) and queues them one by one on a reserved mixer
+    channel, so memory stays the same however long the music plays and
+    nothing is rendered before the first chunk is needed.  Oscillator
+    phases and the beat position carry over between chunks, so tempo and
+    intensity (see set_level) change smoothly at the next chunk.
+    Samples are 16-bit, as mixed by the default pygame.mixer.init().
+    """
+    def __init__(self, chunk_ms=100, buffer_chunks=4, volume=0.5, channel=0):
+        self.sample_rate, _, self.channels = pygame.mixer.get_init()
+        self.chunk_samples = int(self.sample_rate * chunk_ms / 1000)
+        self.chunk_seconds = self.chunk_samples / self.sample_rate
+        self.ring = deque(maxlen=buffer_chunks)
+        if pygame.mixer.get_num_channels() <= channel:
+            pygame.mixer.set_num_channels(channel + 1)
+        # Reserved channels are never picked for sound effects
+        pygame.mixer.set_reserved(channel + 1)
+        self.channel = pygame.mixer.Channel(channel)
+        self.channel.set_volume(volume)
+        self.tempo = 96.0
+        self.intensity = 0.3
+        self.beat = 0.0
+        self.phases = np.zeros(5)
+        self.noise = np.random.default_rng(0)
+        self.thread = None
+        self.running = False
+        self.chunks = 0
+
+    def set_level(self, level):
+        """Faster and busier music the higher the level"""
+        self.tempo = min(150.0, 90.0 + 6.0 * (level - 1))
+        self.intensity = min(1.0, 0.2 + 0.1 * level)
+
+    def set_volume(self, volume):
+        self.channel.set_volume(volume)
+
+    def get_volume(self):
+        return self.channel.get_volume()
+
+    def start(self):
+        if self.thread is None:
+            self.running = True
+            self.thread = threading.Thread(target=self.run, name="music", daemon=True)
+            self.thread.start()
+            # pygame quits the mixer at exit, which must not happen mid-chunk
+            atexit.register(self.stop)
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+            atexit.unregister(self.stop)
+        if pygame.mixer.get_init():
+            self.channel.stop()
+
+    def run(self):
+        while self.running:
+            # Render ahead until the ring is full, then feed the channel
+            if len(self.ring) < self.ring.maxlen:
+                self.ring.append(self.render_chunk())
+                continue
+            if not self.channel.get_busy():
+                self.channel.play(self.ring.popleft())
+            elif self.channel.get_queue() is None:
+                self.channel.queue(self.ring.popleft())
+            else:
+                time.sleep(self.chunk_seconds / 4)
+
+    def render_chunk(self):
+        """The next chunk_samples of music as a mixer Sound"""
+        mono = self.synthesize(self.chunk_samples)
+        samples = np.int16(np.clip(mono, -1, 1) * 32767)
+        self.chunks += 1
+        return pygame.sndarray.make_sound(np.repeat(samples[:, None], self.channels, axis=1))
+
+    def synthesize(self, count):
+        rate = self.sample_rate
+        beats = self.beat + np.arange(count) * (self.tempo / 60 / rate)
+        self.beat = float(beats[-1] + self.tempo / 60 / rate)
+        bar = (beats // 4).astype(np.intp) % len(PROGRESSION)
+        chords = np.array(PROGRESSION)[bar]  # (count, 3)
+        step = (beats * 4).astype(np.intp)   # Sixteenth notes
+        beat_phase = beats % 1
+
+        # Bass root, the three chord tones and an arpeggio over them
+        arpeggio = chords[np.arange(count), step % 3] * 2
+        frequencies = np.column_stack((chords[:, 0] / 2, chords, arpeggio))
+        phases = self.phases + 2 * np.pi * np.cumsum(frequencies, axis=0) / rate
+        self.phases = phases[-1] % (2 * np.pi)
+        waves = np.sin(phases)
+
+        intensity = self.intensity
+        bass = waves[:, 0] * (0.5 + 0.5 * np.exp(-4 * beat_phase))
+        pad = waves[:, 1:4].sum(axis=1) / 3
+        pluck = np.tanh(3 * waves[:, 4]) * np.exp(-12 * ((beats * 4) % 1)) * intensity
+        mix = 0.35 * bass + 0.25 * pad + 0.25 * pluck
+        if intensity > 0.4:
+            # Off-beat hi-hat from the busier levels on
+            mix += (0.1 * (intensity - 0.4) * self.noise.normal(0, 1, count) *
+                    np.exp(-40 * ((beats * 2) % 1)))
+        return mix
@@ -0,0 +1,62 @@
+from collections import deque
+import math
+
+class FixedTimestep:
+    """Accumulator that turns variable frame times into fixed simulation ticks
+
+    advance() returns how many ticks to run for a rendered frame.  At most
+    max_catch_up ticks run per frame; time beyond that is dropped (and
+    counted) so a slow machine slows down instead of spiralling.  alpha is
+    how far the renderer is between the last two ticks.
+    """
+    def __init__(self, tick_rate=60, max_catch_up=5):
+        self.tick_rate = tick_rate
+        self.tick_ms = 1000 / tick_rate
+        self.max_catch_up = max_catch_up
+        self.accumulator = 0.0
+        self.dropped = 0
+
+    def advance(self, frame_ms):
+        self.accumulator += frame_ms
+        ticks = int(self.accumulator // self.tick_ms)
+        if ticks > self.max_catch_up:
+            self.dropped += ticks - self.max_catch_up
+            ticks = self.max_catch_up
+            self.accumulator %= self.tick_ms
+        else:
+            self.accumulator -= ticks * self.tick_ms
+        return ticks
+
+    @property
+    def alpha(self):
+        return min(self.accumulator / self.tick_ms, 1.0)
+
+    def reset(self):
+        self.accumulator = 0.0
+
+class FrameStats:
+    """Rolling frame-time and jitter statistics over the last window frames"""
+    def __init__(self, window=240):
+        self.frame_times = deque(maxlen=window)
+        self.tick_counts = deque(maxlen=window)
+        self.frames = 0
+
+    def record(self, frame_ms, ticks):
+        self.frame_times.append(frame_ms)
+        self.tick_counts.append(ticks)
+        self.frames += 1
+
+    def summary(self):
+        if not self.frame_times:
+            return {"fps": 0.0, "mean_ms": 0.0, "jitter_ms": 0.0, "worst_ms": 0.0,
+                    "ticks_per_frame": 0.0}
+        count = len(self.frame_times)
+        mean = sum(self.frame_times) / count
+        variance = sum((t - mean) ** 2 for t in self.frame_times) / count
+        return {
+            "fps": 1000 / mean if mean > 0 else 0.0,
+            "mean_ms": mean,
+            "jitter_ms": math.sqrt(variance),
+            "worst_ms": max(self.frame_times),
+            "ticks_per_frame": sum(self.tick_counts) / count
+        }
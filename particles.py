@@ -0,0 +1,144 @@
+import numpy as np
+
+class ParticleSystem:
+    """Fixed-capacity particle pool stored as NumPy arrays
+
+    Particles are stored in spawn order between start and count, so the
+    ones that expire (all live for `lifetime` ticks) are always a prefix
+    and update() only moves start past them.  Motion is linear, so
+    positions are worked out from the spawn point and age when drawn
+    instead of being integrated every tick.  When the pool is full new
+    particles are dropped.
+    """
+    def __init__(self, capacity=65536, size=4, lifetime=30, rng=None):
+        self.capacity = capacity
+        self.size = size
+        self.lifetime = lifetime
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.origin = np.zeros((capacity, 2), dtype=np.float32)
+        self.vel = np.zeros((capacity, 2), dtype=np.float32)
+        self.birth = np.zeros(capacity, dtype=np.int64)
+        self.color = np.zeros((capacity, 3), dtype=np.uint8)
+        self.start = 0
+        self.count = 0
+        self.now = 0
+        self._squares = {}
+
+    def __len__(self):
+        return self.count - self.start
+
+    def emit(self, x, y, color, amount=5, speed=1.0, jitter=0):
+        """Spawn particles at (x, y) with random velocity in [-2, 2] * speed"""
+        if self.count + amount > self.capacity and self.start:
+            self.compact()
+        amount = min(amount, self.capacity - self.count)
+        if amount <= 0:
+            return
+        start, end = self.count, self.count + amount
+        pos = self.origin[start:end]
+        pos[:, 0] = x
+        pos[:, 1] = y
+        if jitter:
+            pos += self.rng.integers(-jitter, jitter + 1, size=(amount, 2))
+        self.vel[start:end] = self.rng.uniform(-2, 2, size=(amount, 2)) * speed
+        self.birth[start:end] = self.now
+        self.color[start:end] = color[:3]
+        self.count = end
+
+    def update(self):
+        """Advance one tick and drop the particles that have expired"""
+        self.now += 1
+        if self.count == self.start:
+            self.start = self.count = 0
+            return
+        # Births are in order, so the expired particles are a prefix
+        expired = self.now - self.lifetime
+        self.start += int(np.searchsorted(self.birth[self.start:self.count], expired,
+                                          side="right"))
+
+    def compact(self):
+        # Move the live particles back to the front of the pool
+        live = slice(self.start, self.count)
+        n = self.count - self.start
+        for array in (self.origin, self.vel, self.birth, self.color):
+            array[:n] = array[live]
+        self.start, self.count = 0, n
+
+    def empty(self):
+        self.start = self.count = 0
+
+    def positions(self, alpha=1.0):
+        """Positions of the live particles, alpha of the way through this tick"""
+        live = slice(self.start, self.count)
+        age = (self.now - self.birth[live] - (1 - alpha)).astype(np.float32)
+        return self.origin[live] + self.vel[live] * age[:, None]
+
+    def square(self, size):
+        """Offsets of the pixels in one size x size square around a particle"""
+        square = self._squares.get(size)
+        if square is None:
+            offsets = np.arange(size) - size // 2
+            square = self._squares[size] = (np.repeat(offsets, size), np.tile(offsets, size))
+        return square
+
+    def draw(self, surface, offset=(0, 0), alpha=1.0, scale=1.0):
+        """Draw every live particle as a filled square in one batch
+
+        alpha below 1 draws particles that far between their previous and
+        current position; scale maps positions and size onto a surface
+        drawn at another resolution.  Returns the positions drawn.
+        """
+        pos = self.positions(alpha)
+        if len(pos) == 0:
+            return pos
+        colors = self.color[self.start:self.count]
+        size = max(1, round(self.size * scale))
+        if surface.get_bytesize() != 4:
+            self._draw_slow(surface, pos, colors, offset, scale, size)
+            return pos
+        width, height = surface.get_size()
+        pitch = surface.get_pitch() // 4
+        half = size // 2
+        left = ((pos[:, 0] + offset[0]) * scale).astype(np.intp) - half
+        top = ((pos[:, 1] + offset[1]) * scale).astype(np.intp) - half
+        colors = self._map_colors(surface, colors)
+        dx, dy = self.square(size)
+        inside = ((left >= 0) & (left <= width - size) &
+                  (top >= 0) & (top <= height - size))
+        pixels = np.frombuffer(surface.get_view("0"), dtype=np.uint32)
+        
+        # Squares fully on screen are written through flat pixel offsets
+        base = top[inside] * pitch + left[inside]
+        inside_colors = colors[inside]
+        for offset_index in dx + half + (dy + half) * pitch:
+            pixels[base + offset_index] = inside_colors
+        
+        # Squares crossing an edge are clipped pixel by pixel
+        edge = ~inside & (left > -size) & (left < width) & \
+               (top > -size) & (top < height)
+        if edge.any():
+            left, top, edge_colors = left[edge], top[edge], colors[edge]
+            for step_x, step_y in zip(dx + half, dy + half):
+                x = left + step_x
+                y = top + step_y
+                visible = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+                pixels[y[visible] * pitch + x[visible]] = edge_colors[visible]
+        del pixels
+        return pos
+
+    def _map_colors(self, surface, colors):
+        # Vectorized Surface.map_rgb for 32-bit surfaces, always opaque
+        masks = surface.get_masks()
+        shifts = surface.get_shifts()
+        losses = surface.get_losses()
+        mapped = np.full(len(colors), masks[3], dtype=np.uint32)
+        for channel in range(3):
+            value = colors[:, channel].astype(np.uint32) >> losses[channel]
+            mapped |= (value << shifts[channel]) & masks[channel]
+        return mapped
+
+    def _draw_slow(self, surface, pos, colors, offset, scale, size):
+        half = size // 2
+        for (x, y), color in zip(pos, colors):
+            surface.fill(tuple(color), (int((x + offset[0]) * scale) - half,
+                                        int((y + offset[1]) * scale) - half, size, size))
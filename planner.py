@@ -0,0 +1,145 @@
+import math
+from time import perf_counter
+import numpy as np
+from projectiles import PLAYER
+
+# Shot patterns, matching Shadow.attack_pattern
+SINGLE, SPREAD, AIMED = 0, 1, 2
+SHOT_ANGLES = {SINGLE: [0], SPREAD: [-30, 0, 30]}
+
+class ShadowPlanner:
+    """Lookahead movement and shot choice for the Shadow under a CPU budget
+
+    Each planning round snapshots the player's projectiles and predicts
+    their straight-line paths, then rolls out every candidate move (eight
+    directions at two speeds, or standing still) for `horizon` ticks,
+    scoring hits taken and distance kept from the player.  Rollouts are
+    evaluated a few candidates per tick, with partial scores kept across
+    ticks, and the best move of the last finished round is followed
+    meanwhile.
+
+    update() returns the move to make or None to fall back to the fixed
+    patterns: before the first round finishes, and for `cooldown` ticks
+    after a tick spends more than budget_ms.  budget_ms=None turns the
+    clock off so planning depends only on the match state (e.g. replays).
+    """
+    def __init__(self, bounds, budget_ms=2.0, horizon=30, candidates_per_tick=6,
+                 preferred_range=60, cooldown=60):
+        self.width, self.height = bounds
+        self.budget_ms = budget_ms
+        self.horizon = horizon
+        self.candidates_per_tick = candidates_per_tick
+        self.preferred_range = preferred_range
+        self.cooldown = cooldown
+        directions = [(math.cos(a), math.sin(a)) for a in np.arange(8) * math.pi / 4]
+        self.candidates = np.array([(0.0, 0.0)] + [(dx * scale, dy * scale)
+                                                   for scale in (1.0, 1.5)
+                                                   for dx, dy in directions])
+        self.ticks = np.arange(1, horizon + 1)
+        self.best = None
+        self.plan = None
+        self.cooldown_timer = 0
+        self.rollouts = 0
+        self.fallbacks = 0
+
+    def update(self, shadow):
+        """Spend this tick's budget planning and return the move to make"""
+        if self.cooldown_timer > 0:
+            self.cooldown_timer -= 1
+            self.fallbacks += 1
+            return None
+        start = perf_counter()
+        if self.plan is None:
+            self.plan = self.start_plan(shadow)
+        self.continue_plan()
+        if self.budget_ms is not None and (perf_counter() - start) * 1000 > self.budget_ms:
+            # Over budget: drop the round and let the patterns play for a while
+            self.plan = None
+            self.best = None
+            self.cooldown_timer = self.cooldown
+        if self.best is None:
+            self.fallbacks += 1
+            return None
+        return tuple(self.best * shadow.speed)
+
+    def start_plan(self, shadow):
+        sim = shadow.sim
+        projectiles = sim.projectiles
+        count = projectiles.count
+        # Only the player's shots can hurt the shadow
+        mine = np.flatnonzero(projectiles.owner[:count] == PLAYER)
+        player = shadow.player
+        previous = getattr(player, "prev_center", player.rect.center)
+        return {
+            "origin": np.array(shadow.rect.center, dtype=np.float64),
+            "reach": np.array(shadow.rect.size) / 2 + projectiles.size / 2,
+            "speed": shadow.speed,
+            "shots": projectiles.pos[mine].copy(),
+            "velocities": projectiles.vel[mine].copy(),
+            "damage": projectiles.damage[mine].copy(),
+            "player": np.array(player.rect.center, dtype=np.float64),
+            "player_velocity": np.subtract(player.rect.center, previous),
+            "half": (shadow.rect.width / 2, shadow.rect.height / 2),
+            "scores": np.full(len(self.candidates), np.nan),
+            "next": 0
+        }
+
+    def continue_plan(self):
+        # Score this tick's share of the candidates; earlier scores are kept
+        plan = self.plan
+        chunk = slice(plan["next"], plan["next"] + self.candidates_per_tick)
+        moves = self.candidates[chunk]
+        plan["scores"][chunk] = self.rollout(plan, moves)
+        plan["next"] += len(moves)
+        self.rollouts += len(moves)
+        if plan["next"] >= len(self.candidates):
+            self.best = self.candidates[int(np.argmax(plan["scores"]))]
+            self.plan = None
+
+    def rollout(self, plan, moves):
+        """Score each move held for the whole horizon"""
+        # Shadow path per move: (moves, ticks, 2)
+        paths = (plan["origin"] + moves[:, None, :] * plan["speed"] *
+                 self.ticks[None, :, None])
+        half_w, half_h = plan["half"]
+        paths[..., 0] = np.clip(paths[..., 0], half_w, self.width - half_w)
+        paths[..., 1] = np.clip(paths[..., 1], half_h, self.height - half_h)
+
+        # Damage from predicted projectile paths: (moves, ticks, shots)
+        danger = np.zeros(len(moves))
+        if len(plan["shots"]):
+            shots = (plan["shots"][None, :, :] +
+                     plan["velocities"][None, :, :] * self.ticks[:, None, None])
+            offset = np.abs(paths[:, :, None, :] - shots[None, :, :, :])
+            hit = (offset < plan["reach"]).all(axis=3).any(axis=1)
+            danger = hit @ plan["damage"]
+
+        # Keep the preferred range from where the player is heading
+        player = plan["player"] + plan["player_velocity"] * self.horizon
+        end = paths[:, -1, :]
+        distance = np.hypot(end[:, 0] - player[0], end[:, 1] - player[1])
+        return -danger - np.abs(distance - self.preferred_range) / 50
+
+    def choose_shot(self, shadow, horizon=90):
+        """Pick the shot pattern most likely to hit the player's predicted path"""
+        if self.cooldown_timer > 0:
+            return None
+        player = shadow.player
+        previous = getattr(player, "prev_center", player.rect.center)
+        velocity = np.subtract(player.rect.center, previous)
+        ticks = np.arange(1, horizon + 1)[:, None]
+        targets = np.array(player.rect.center, dtype=np.float64) + velocity * ticks
+        origin = np.array(shadow.rect.center, dtype=np.float64)
+        projectiles = shadow.sim.projectiles
+        reach = np.array(player.rect.size) / 2 + projectiles.size / 2
+
+        best, best_hits = AIMED, -1
+        for pattern, angles in SHOT_ANGLES.items():
+            radians = np.radians(angles)
+            velocities = np.column_stack((-np.cos(radians), np.sin(radians))) * projectiles.speed
+            shots = origin + velocities[:, None, :] * ticks[None, :, :]
+            hits = (np.abs(shots - targets[None, :, :]) < reach).all(axis=2).any(axis=1).sum()
+            if hits > best_hits:
+                best, best_hits = pattern, hits
+        # An aimed shot is the default when no fixed pattern would connect
+        return best if best_hits > 0 else AIMED
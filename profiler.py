@@ -0,0 +1,120 @@
+from collections import deque
+import csv
+import json
+from time import perf_counter_ns
+import numpy as np
+
+class _Phase:
+    """Reusable context manager that adds its elapsed time to one phase"""
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, perf_counter_ns() - self.start)
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+class NullProfiler:
+    """Stand-in used when nothing is being measured"""
+    _phase = _NullPhase()
+
+    def phase(self, name):
+        return self._phase
+
+    def count(self, name, value):
+        pass
+
+NULL_PROFILER = NullProfiler()
+
+class FrameProfiler:
+    """Per-phase frame timings with a rolling window and optional logging
+
+    Wrap each part of a frame in `with profiler.phase(name)`; a phase hit
+    several times in one frame (e.g. once per simulation tick) is summed.
+    Entity counts are attached with count().  The last window frames are
+    kept for percentiles; with logging on, every frame record is kept for
+    export to CSV or JSON.
+    """
+    def __init__(self, window=300, log=False):
+        self.history = deque(maxlen=window)
+        self.log = [] if log else None
+        self.phases = {}
+        self.current = {}
+        self.counts = {}
+        self.frame = 0
+        self.frame_start = 0
+
+    def phase(self, name):
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = _Phase(self, name)
+        return phase
+
+    def add(self, name, elapsed_ns):
+        self.current[name] = self.current.get(name, 0) + elapsed_ns
+
+    def count(self, name, value):
+        self.counts[name] = value
+
+    def begin_frame(self):
+        self.current = {}
+        self.counts = {}
+        self.frame_start = perf_counter_ns()
+
+    def end_frame(self):
+        record = {"frame": self.frame,
+                  "total_ms": (perf_counter_ns() - self.frame_start) / 1e6}
+        for name, elapsed in self.current.items():
+            record[name + "_ms"] = elapsed / 1e6
+        record.update(self.counts)
+        self.history.append(record)
+        if self.log is not None:
+            self.log.append(record)
+        self.frame += 1
+        return record
+
+    def percentiles(self, key, points=(50, 95, 99)):
+        """Percentiles of one record field over the rolling window"""
+        values = [record.get(key, 0) for record in self.history]
+        if not values:
+            return [0.0 for _ in points]
+        return np.percentile(values, points).tolist()
+
+    def summary(self):
+        """Return {field: [p50, p95, p99]} for every timed field"""
+        keys = []
+        for record in self.history:
+            for key in record:
+                if key.endswith("_ms") and key not in keys:
+                    keys.append(key)
+        return {key: self.percentiles(key) for key in keys}
+
+    def export(self, path):
+        """Write the logged frames to path as CSV or JSON (by extension)"""
+        records = self.log if self.log is not None else list(self.history)
+        if path.endswith(".json"):
+            with open(path, "w") as file:
+                json.dump(records, file)
+            return
+        fields = []
+        for record in records:
+            for key in record:
+                if key not in fields:
+                    fields.append(key)
+        with open(path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=fields, restval=0)
+            writer.writeheader()
+            writer.writerows(records)
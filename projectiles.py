@@ -0,0 +1,137 @@
+import numpy as np
+
+# Projectile owners
+PLAYER = 0
+SHADOW = 1
+
+class ProjectileStore:
+    """All live projectiles as NumPy arrays with float positions
+
+    Velocities are worked out once when a shot is fired; update, off-screen
+    culling and hit tests then run over whole arrays.  Live projectiles are
+    packed at the front of the arrays and new shots are dropped when the
+    store is full.
+    """
+    def __init__(self, bounds, capacity=16384, size=10, speed=7):
+        self.width, self.height = bounds
+        self.capacity = capacity
+        self.size = size
+        self.speed = speed
+        self.pos = np.zeros((capacity, 2), dtype=np.float64)
+        self.vel = np.zeros((capacity, 2), dtype=np.float64)
+        self.owner = np.zeros(capacity, dtype=np.int8)
+        self.damage = np.zeros(capacity, dtype=np.float64)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def fire(self, x, y, direction, angles, owner, damage):
+        """Spawn one projectile per angle (in degrees) from (x, y)
+
+        Like the old Projectile sprite, direction flips the horizontal
+        component only.
+        """
+        amount = min(len(angles), self.capacity - self.count)
+        if amount <= 0:
+            return
+        start, end = self.count, self.count + amount
+        radians = np.radians(np.asarray(angles[:amount], dtype=np.float64))
+        self.pos[start:end] = (x, y)
+        self.vel[start:end, 0] = self.speed * direction * np.cos(radians)
+        self.vel[start:end, 1] = self.speed * np.sin(radians)
+        self.owner[start:end] = owner
+        self.damage[start:end] = damage
+        self.count = end
+
+    def fire_batch(self, xs, ys, direction, angles, owner, damage):
+        """Spawn one projectile per entry of the xs, ys, angles and damage arrays"""
+        amount = min(len(xs), self.capacity - self.count)
+        if amount <= 0:
+            return
+        start, end = self.count, self.count + amount
+        radians = np.radians(angles[:amount])
+        self.pos[start:end, 0] = xs[:amount]
+        self.pos[start:end, 1] = ys[:amount]
+        self.vel[start:end, 0] = self.speed * direction * np.cos(radians)
+        self.vel[start:end, 1] = self.speed * np.sin(radians)
+        self.owner[start:end] = owner
+        self.damage[start:end] = damage[:amount]
+        self.count = end
+
+    def update(self):
+        n = self.count
+        if n == 0:
+            return
+        self.pos[:n] += self.vel[:n]
+        half = self.size / 2
+        x = self.pos[:n, 0]
+        y = self.pos[:n, 1]
+        offscreen = ((x + half < 0) | (x - half > self.width) |
+                     (y + half < 0) | (y - half > self.height))
+        if offscreen.any():
+            self.remove(np.flatnonzero(offscreen))
+
+    def hits(self, rect, owner, candidates=None):
+        """Return indices of the owner's projectiles overlapping rect
+
+        candidates limits the test to those indices, e.g. from a broadphase.
+        """
+        if candidates is None:
+            candidates = np.arange(self.count)
+        if len(candidates) == 0:
+            return np.empty(0, dtype=np.intp)
+        half = self.size / 2
+        x = self.pos[candidates, 0]
+        y = self.pos[candidates, 1]
+        overlap = ((self.owner[candidates] == owner) &
+                   (x - half < rect.right) & (x + half > rect.left) &
+                   (y - half < rect.bottom) & (y + half > rect.top))
+        return candidates[overlap]
+
+    def remove(self, indices):
+        """Drop the projectiles at the given indices"""
+        if len(indices) == 0:
+            return
+        keep = np.ones(self.count, dtype=bool)
+        keep[indices] = False
+        keep = np.flatnonzero(keep)
+        k = len(keep)
+        self.pos[:k] = self.pos[keep]
+        self.vel[:k] = self.vel[keep]
+        self.owner[:k] = self.owner[keep]
+        self.damage[:k] = self.damage[keep]
+        self.count = k
+
+    def empty(self):
+        self.count = 0
+
+    def centers(self, indices):
+        """Integer centers of the given projectiles, for effects"""
+        return [(int(x), int(y)) for x, y in self.pos[indices]]
+
+    def positions(self, alpha=1.0):
+        """Positions of the live projectiles, alpha of the way through this tick"""
+        pos = self.pos[:self.count]
+        if alpha < 1:
+            pos = pos - self.vel[:self.count] * (1 - alpha)
+        return pos
+
+    def draw(self, surface, images, offset=(0, 0), alpha=1.0, scale=1.0):
+        """Blit images[owner] at every live projectile in one blits() call
+
+        alpha below 1 draws projectiles that far between their previous and
+        current position; with scale the images must already be scaled to
+        match.  Returns the positions drawn.
+        """
+        pos = self.positions(alpha)
+        n = self.count
+        if n == 0:
+            return pos
+        half = self.size // 2
+        topleft = ((pos - half + offset) * scale).astype(np.intp)
+        owners = self.owner[:n].tolist()
+        surface.blits([(images[owner], position)
+                       for owner, position in zip(owners, topleft.tolist())],
+                      doreturn=False)
+        return pos
@@ -0,0 +1,101 @@
+from collections import deque
+
+class QualityLevel:
+    """How much visual effect work one quality step allows"""
+    def __init__(self, name, particles, trail_every, explosion_step, shake, resolution):
+        self.name = name
+        self.particles = particles            # Fraction of particles emitted
+        self.trail_every = trail_every        # Emit trails every n ticks
+        self.explosion_step = explosion_step  # Explosion frames advanced per step
+        self.shake = shake                    # Screen shake intensity scale
+        self.resolution = resolution          # Internal render scale, when scaled
+
+# Best first; the governor steps down this list when frames run long
+QUALITY_LEVELS = [
+    QualityLevel("high", 1.0, 1, 1, 1.0, 1.0),
+    QualityLevel("medium", 0.6, 1, 1, 1.0, 1.0),
+    QualityLevel("low", 0.35, 2, 2, 0.5, 1.0),
+    QualityLevel("lower", 0.2, 3, 2, 0.0, 0.75),
+    QualityLevel("minimal", 0.1, 4, 3, 0.0, 0.5)
+]
+
+class QualityGovernor:
+    """Trades visual effects for frame time to hold a target frame rate
+
+    observe() takes the time each frame spent working (simulation, effects,
+    drawing and presenting, not waiting on the frame limiter).  Once the
+    last `window` frames average above `high` of the frame budget the
+    quality drops a level; it only rises again after `recover` frames in a
+    row averaging below `low`, and no change is made for `settle` frames
+    after the last one, so the level does not flap around the threshold.
+    """
+    def __init__(self, target_fps=60, levels=QUALITY_LEVELS, window=30, high=0.9,
+                 low=0.6, recover=180, settle=60, enabled=True):
+        self.budget_ms = 1000 / target_fps
+        self.levels = levels
+        self.high = high
+        self.low = low
+        self.recover = recover
+        self.settle = settle
+        self.enabled = enabled
+        self.work_times = deque(maxlen=window)
+        self.index = 0
+        self.cooldown = 0
+        self.calm_frames = 0
+        self.changes = 0
+
+    @property
+    def level(self):
+        return self.levels[self.index]
+
+    def observe(self, work_ms):
+        """Record one frame's work time and adjust the level if needed"""
+        self.work_times.append(work_ms)
+        if not self.enabled:
+            return
+        if self.cooldown > 0:
+            self.cooldown -= 1
+            return
+        if len(self.work_times) < self.work_times.maxlen:
+            return
+        load = self.load()
+        if load > self.high and self.index < len(self.levels) - 1:
+            self.change(1)
+        elif load < self.low and self.index > 0:
+            self.calm_frames += 1
+            if self.calm_frames >= self.recover:
+                self.change(-1)
+        else:
+            self.calm_frames = 0
+
+    def change(self, step):
+        self.index += step
+        self.changes += 1
+        self.calm_frames = 0
+        self.cooldown = self.settle
+        self.work_times.clear()
+
+    def set_level(self, name):
+        """Pin the level by name, e.g. for benchmarks"""
+        self.index = [level.name for level in self.levels].index(name)
+        self.work_times.clear()
+
+    def load(self):
+        """Recent mean work time as a fraction of the frame budget"""
+        if not self.work_times:
+            return 0.0
+        return sum(self.work_times) / len(self.work_times) / self.budget_ms
+
+    def scale(self, amount):
+        """Scale a particle count, keeping at least one when any were asked for"""
+        if amount <= 0:
+            return 0
+        return max(1, round(amount * self.level.particles))
+
+    def summary(self):
+        return {
+            "level": self.level.name,
+            "load": self.load(),
+            "budget_ms": self.budget_ms,
+            "changes": self.changes
+        }
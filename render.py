@@ -0,0 +1,183 @@
+import weakref
+import numpy as np
+import pygame
+
+class DirtyRenderer:
+    """Draws onto a persistent surface and only refreshes what changed
+
+    The frame is split into square tiles.  Everything drawn through the
+    renderer marks the tiles it touches; the next frame clears only those
+    tiles back to the background and the display is updated with the tiles
+    touched in either frame.  Everything is drawn shifted by the camera
+    offset given to begin(), which is how screen shake is applied.
+
+    With dirty_rects off, or after invalidate(), the whole frame is cleared
+    and flipped instead.
+
+    Positions are given in game coordinates.  A surface smaller than the
+    game area is drawn on with scale < 1: positions are scaled and images
+    are swapped for scaled copies, made once per image.  The finished
+    frame goes to output, anything with pygame.display's flip() and
+    update(rects).
+    """
+    def __init__(self, surface, background=(0, 0, 0), tile_size=32, dirty_rects=True,
+                 scale=1.0, output=pygame.display):
+        self.background = background
+        self.tile_size = tile_size
+        self.dirty_rects = dirty_rects
+        self.output = output
+        self.offset = (0, 0)
+        self.set_surface(surface, scale)
+
+    def set_surface(self, surface, scale=1.0):
+        """Draw onto a new surface (e.g. at another resolution) from the next frame"""
+        self.surface = surface
+        self.scale = scale
+        self.scaled_images = weakref.WeakKeyDictionary()
+        width, height = surface.get_size()
+        self.cols = -(-width // self.tile_size)
+        self.rows = -(-height // self.tile_size)
+        self.drawn = np.zeros((self.rows, self.cols), dtype=bool)
+        self.previous = np.zeros_like(self.drawn)
+        self.full_redraw = True
+
+    def invalidate(self):
+        """Redraw the whole frame next time, e.g. after a menu drew over it"""
+        self.full_redraw = True
+
+    def begin(self, offset=(0, 0)):
+        self.offset = offset
+        self.previous, self.drawn = self.drawn, self.previous
+        self.drawn[:] = False
+        if self.full_redraw or not self.dirty_rects:
+            self.surface.fill(self.background)
+        else:
+            for rect in self.tile_rects(self.previous):
+                self.surface.fill(self.background, rect)
+
+    def present(self):
+        if self.full_redraw or not self.dirty_rects:
+            self.output.flip()
+            self.full_redraw = False
+        else:
+            self.output.update(self.tile_rects(self.previous | self.drawn))
+
+    def mark(self, rect):
+        """Mark the tiles under an on-screen rect as drawn"""
+        if rect.width <= 0 or rect.height <= 0:
+            return
+        size = self.tile_size
+        c0 = max(rect.left // size, 0)
+        r0 = max(rect.top // size, 0)
+        c1 = min((rect.right - 1) // size, self.cols - 1)
+        r1 = min((rect.bottom - 1) // size, self.rows - 1)
+        if c0 <= c1 and r0 <= r1:
+            self.drawn[r0:r1 + 1, c0:c1 + 1] = True
+
+    def mark_points(self, xs, ys, radius):
+        """Mark every tile under squares of the given radius around points
+
+        Points are in world coordinates; the camera offset and scale are
+        applied here.  Squares wider than a tile mark the tiles between
+        their corners too.
+        """
+        if len(xs) == 0:
+            return
+        width, height = self.surface.get_size()
+        size = self.tile_size
+        scale = self.scale
+        x0 = (xs + (self.offset[0] - radius)) * scale
+        x1 = (xs + (self.offset[0] + radius)) * scale
+        y0 = (ys + (self.offset[1] - radius)) * scale
+        y1 = (ys + (self.offset[1] + radius)) * scale
+        visible = (x1 >= 0) & (x0 < width) & (y1 >= 0) & (y0 < height)
+        if not visible.any():
+            return
+        first_col = np.clip(x0[visible] // size, 0, self.cols - 1).astype(np.intp)
+        last_col = np.clip(x1[visible] // size, 0, self.cols - 1).astype(np.intp)
+        first_row = np.clip(y0[visible] // size, 0, self.rows - 1).astype(np.intp)
+        last_row = np.clip(y1[visible] // size, 0, self.rows - 1).astype(np.intp)
+        # Every square spans at most this many tiles a side
+        span = int(2 * radius * scale // size) + 2
+        for i in range(span):
+            col = first_col + i
+            in_col = col <= last_col
+            for j in range(span):
+                row = first_row + j
+                covered = in_col & (row <= last_row)
+                self.drawn[row[covered], col[covered]] = True
+
+    def blit(self, image, position, area=None):
+        x, y = position[0] + self.offset[0], position[1] + self.offset[1]
+        if self.scale != 1:
+            image = self.scaled(image)
+            x, y = int(x * self.scale), int(y * self.scale)
+            if area is not None:
+                area = self.scale_rect(area)
+        rect = self.surface.blit(image, (x, y), area)
+        self.mark(rect)
+        return rect
+
+    def draw_rect(self, color, rect, width=0):
+        rect = pygame.Rect(rect).move(self.offset)
+        if self.scale != 1:
+            rect = self.scale_rect(rect)
+            width = max(1, round(width * self.scale)) if width else 0
+        rect = pygame.draw.rect(self.surface, color, rect, width)
+        self.mark(rect)
+        return rect
+
+    def scaled(self, image):
+        """image resized to this renderer's scale (the image itself at 1)"""
+        if self.scale == 1 or not (image.get_width() and image.get_height()):
+            return image
+        scaled = self.scaled_images.get(image)
+        if scaled is None:
+            width, height = image.get_size()
+            size = (max(1, round(width * self.scale)), max(1, round(height * self.scale)))
+            if image.get_bitsize() >= 24 and image.get_colorkey() is None:
+                scaled = pygame.transform.smoothscale(image, size)
+            else:
+                scaled = pygame.transform.scale(image, size)
+            self.scaled_images[image] = scaled
+        return scaled
+
+    def scale_rect(self, rect):
+        scale = self.scale
+        rect = pygame.Rect(rect)
+        left, top = int(rect.left * scale), int(rect.top * scale)
+        return pygame.Rect(left, top, int(rect.right * scale) - left,
+                           int(rect.bottom * scale) - top)
+
+    def draw_group(self, group):
+        for sprite in group:
+            self.blit(sprite.image, sprite.rect.topleft)
+
+    def draw_sprite(self, sprite, center):
+        """Draw a sprite's current image centered on center"""
+        self.blit(sprite.image, sprite.image.get_rect(center=center).topleft)
+
+    def draw_projectiles(self, projectiles, images, alpha=1.0):
+        """Draw a ProjectileStore with images[owner]"""
+        images = {owner: self.scaled(image) for owner, image in images.items()}
+        pos = projectiles.draw(self.surface, images, self.offset, alpha, self.scale)
+        self.mark_points(pos[:, 0], pos[:, 1], projectiles.size // 2)
+
+    def draw_horde(self, horde, image, alpha=1.0):
+        pos = horde.draw(self.surface, self.scaled(image), self.offset, alpha, self.scale)
+        self.mark_points(pos[:, 0], pos[:, 1], horde.size // 2)
+
+    def draw_particles(self, particles, alpha=1.0):
+        pos = particles.draw(self.surface, self.offset, alpha, self.scale)
+        self.mark_points(pos[:, 0], pos[:, 1], particles.size // 2)
+
+    def tile_rects(self, tiles):
+        """Merge each row of marked tiles into as few rects as possible"""
+        size = self.tile_size
+        padded = np.zeros((self.rows, self.cols + 2), dtype=bool)
+        padded[:, 1:-1] = tiles
+        # Run boundaries come in start/end pairs, row by row
+        rows, cols = np.nonzero(padded[:, 1:] != padded[:, :-1])
+        return [pygame.Rect(start * size, row * size, (end - start) * size, size)
+                for row, start, end in zip(rows[::2].tolist(), cols[::2].tolist(),
+                                           cols[1::2].tolist())]
@@ -0,0 +1,216 @@
+"""Record and replay play sessions
+
+A recording holds the seed the session ran with and every simulation
+tick's input, run-length encoded and zlib compressed, so a replay feeds
+the Simulation exactly the same inputs and random numbers as the original
+run.  Upgrade choices made between levels are stored in the same stream.
+
+    python replay.py session.ssr          # fast-forward without rendering
+    python replay.py session.ssr --watch  # play it back in the window
+"""
+import argparse
+import random
+import struct
+import time
+import zlib
+import numpy as np
+
+MAGIC = b"SSRP"
+# 3: player timers run on the simulation's timing wheel, so older
+# recordings map their inputs to different ticks
+# 4: shadow shot damage and fresh players per level are back to the
+# original rules
+VERSION = 4
+HEADER = struct.Struct("<4sHQHHB")  # magic, version, seed, tick rate, start level, flags
+RUN = struct.Struct("<HBhh")        # ticks, buttons, aim x, aim y
+FOOTER = struct.Struct("<IIi")      # ticks, final state digest, final level
+
+# Button bits of a run; a run of zero ticks records an upgrade choice
+LEFT, RIGHT, UP, DOWN, DASH, SHOOT = (1 << bit for bit in range(6))
+MAX_RUN = 0xFFFF
+# Header flags
+HORDE = 1
+
+class ReplayError(Exception):
+    pass
+
+class RandomStreams:
+    """Independent random streams derived from one session seed
+
+    Each subsystem draws from its own named stream, so adding a random
+    call in one place does not shift the numbers every other place sees.
+    """
+    def __init__(self, seed=None):
+        self.seed = seed if seed is not None else random.randrange(1 << 63)
+
+    def stream(self, name):
+        return random.Random(f"{self.seed}:{name}")
+
+    def numpy(self, name):
+        return np.random.default_rng([self.seed, zlib.crc32(name.encode())])
+
+def pack_input(inputs):
+    buttons = ((LEFT if inputs.left else 0) | (RIGHT if inputs.right else 0) |
+               (UP if inputs.up else 0) | (DOWN if inputs.down else 0) |
+               (DASH if inputs.dash else 0) | (SHOOT if inputs.shoot else 0))
+    return buttons, int(inputs.aim[0]), int(inputs.aim[1])
+
+def unpack_input(buttons, x, y, input_class):
+    return input_class(left=bool(buttons & LEFT), right=bool(buttons & RIGHT),
+                       up=bool(buttons & UP), down=bool(buttons & DOWN),
+                       dash=bool(buttons & DASH), shoot=bool(buttons & SHOOT),
+                       aim=(x, y))
+
+def state_digest(sim):
+    """Checksum of the match state, used to check a replay matched"""
+    player, shadow = sim.player, sim.shadow
+    values = struct.pack("<9d4i", player.health, player.energy, player.score,
+                         player.speed, player.damage_multiplier,
+                         shadow.health, player.shield, sim.time_ms,
+                         player.max_health, player.rect.centerx, player.rect.centery,
+                         shadow.rect.centerx, shadow.rect.centery)
+    count = sim.projectiles.count
+    digest = zlib.crc32(values)
+    digest = zlib.crc32(sim.projectiles.pos[:count].tobytes(), digest)
+    return zlib.crc32(sim.projectiles.damage[:count].tobytes(), digest)
+
+class InputRecorder:
+    """Collects per-tick inputs and upgrade choices for one session"""
+    def __init__(self, seed, tick_rate, level=1, horde=False):
+        self.seed = seed
+        self.tick_rate = tick_rate
+        self.level = level
+        self.horde = horde
+        self.runs = []
+        self.ticks = 0
+
+    def record(self, inputs):
+        key = pack_input(inputs)
+        self.ticks += 1
+        if self.runs:
+            count, *last = self.runs[-1]
+            if count and count < MAX_RUN and tuple(last) == key:
+                self.runs[-1][0] += 1
+                return
+        self.runs.append([1, *key])
+
+    def upgrade(self, choice):
+        self.runs.append([0, choice, 0, 0])
+
+    def to_bytes(self, sim):
+        body = b"".join(RUN.pack(*run) for run in self.runs)
+        flags = HORDE if self.horde else 0
+        return (HEADER.pack(MAGIC, VERSION, self.seed, self.tick_rate, self.level, flags) +
+                zlib.compress(body, 9) +
+                FOOTER.pack(self.ticks, state_digest(sim), sim.level))
+
+    def save(self, path, sim):
+        with open(path, "wb") as file:
+            file.write(self.to_bytes(sim))
+
+class InputReplay:
+    """Plays a recording back as a stream of inputs and upgrade choices"""
+    def __init__(self, data, input_class):
+        if len(data) < HEADER.size + FOOTER.size:
+            raise ReplayError("recording is truncated")
+        magic, version = struct.unpack_from("<4sH", data)
+        if magic != MAGIC:
+            raise ReplayError("not a Shadow Self recording")
+        if version < VERSION:
+            raise ReplayError(f"recording format {version} was made with older game rules "
+                              f"and cannot be replayed by format {VERSION}")
+        if version != VERSION:
+            raise ReplayError(f"recording format {version} is not supported")
+        _, _, self.seed, self.tick_rate, self.level, flags = HEADER.unpack_from(data)
+        self.horde = bool(flags & HORDE)
+        self.ticks, self.digest, self.final_level = FOOTER.unpack_from(data, len(data) - FOOTER.size)
+        body = zlib.decompress(data[HEADER.size:len(data) - FOOTER.size])
+        self.runs = list(RUN.iter_unpack(body))
+        self.input_class = input_class
+        self.index = 0
+        self.remaining = 0
+        self.current = None
+
+    @classmethod
+    def load(cls, path, input_class):
+        with open(path, "rb") as file:
+            return cls(file.read(), input_class)
+
+    @property
+    def done(self):
+        return self.remaining == 0 and self.index >= len(self.runs)
+
+    def next_input(self):
+        """Input for the next tick; the last input repeats once the stream ends"""
+        # Upgrade choices are only consumed by next_upgrade()
+        if self.remaining == 0 and self.index < len(self.runs) and self.runs[self.index][0] > 0:
+            count, buttons, x, y = self.runs[self.index]
+            self.index += 1
+            self.remaining = count
+            self.current = unpack_input(buttons, x, y, self.input_class)
+        if self.current is None:
+            self.current = self.input_class()
+        if self.remaining > 0:
+            self.remaining -= 1
+        return self.current
+
+    def next_upgrade(self):
+        """The upgrade chosen at this level end, or None if none was recorded"""
+        if self.remaining == 0 and self.index < len(self.runs) and self.runs[self.index][0] == 0:
+            self.index += 1
+            return self.runs[self.index - 1][1]
+        return None
+
+def fast_forward(replay, simulation_class):
+    """Run a recording through a headless Simulation as fast as possible"""
+    sim = simulation_class(level=replay.level, seed=replay.seed, planner_budget_ms=None,
+                           horde=replay.horde)
+    for _ in range(replay.ticks):
+        sim.step(replay.next_input(), 1000 / replay.tick_rate)
+        if sim.outcome == "level_complete":
+            sim.complete_level()
+            choice = replay.next_upgrade()
+            if choice is not None:
+                sim.player.upgrade(list(sim.player.upgrades)[choice])
+            elif replay.done and not sim.player.fully_upgraded():
+                # Quit on the upgrade screen: the digest was taken before the next level
+                break
+            sim.reset_level()
+        elif sim.outcome == "game_over":
+            break
+    return sim
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded Shadow Self session")
+    parser.add_argument("path", help="recording written with Shadow.py --record")
+    parser.add_argument("--watch", action="store_true", help="render the replay in a window")
+    args = parser.parse_args()
+
+    import os
+    if not args.watch:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import Shadow
+    try:
+        replay = InputReplay.load(args.path, Shadow.InputState)
+    except ReplayError as e:
+        raise SystemExit(f"{args.path}: {e}")
+    if args.watch:
+        game = Shadow.Game(replay=replay)
+        game.run()
+        return
+
+    start = time.perf_counter()
+    sim = fast_forward(replay, Shadow.Simulation)
+    elapsed = time.perf_counter() - start
+    digest = state_digest(sim)
+    print(f"{replay.ticks} ticks in {elapsed:.2f}s ({replay.ticks / elapsed:.0f} ticks/s)")
+    print(f"level {sim.level}, score {sim.player.score}")
+    if digest == replay.digest and sim.level == replay.final_level:
+        print("final state matches the recording")
+    else:
+        print(f"final state differs: {digest:08x} != {replay.digest:08x}")
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import pygame
+
+class RotationCache:
+    """Rotated copies of one image at angles quantized to step degrees
+
+    Rotations are built lazily the first time an angle bucket is asked for,
+    or all at once with prewarm().  Every rotated surface keeps the source
+    center at its own center, so callers only need to re-center their rect.
+    """
+    def __init__(self, image, step=2):
+        self.image = image
+        self.step = step
+        self.count = max(1, round(360 / step))
+        self.frames = [None] * self.count
+
+    def index(self, angle):
+        return round(angle / self.step) % self.count
+
+    def get(self, angle):
+        index = self.index(angle)
+        frame = self.frames[index]
+        if frame is None:
+            frame = pygame.transform.rotate(self.image, index * self.step)
+            self.frames[index] = frame
+        return frame
+
+    def prewarm(self):
+        for index in range(self.count):
+            self.get(index * self.step)
+        return self
@@ -0,0 +1,76 @@
+class TimingWheel:
+    """Hierarchical timing wheel of callbacks keyed on the simulation tick
+
+    schedule() files a callback under the tick it is due, in the finest
+    wheel whose current rotation contains that tick; coarser wheels hold
+    later ticks and are cascaded down as their slot comes round.  Adding,
+    cancelling and firing are O(1) per callback, so entities that only
+    wait to expire cost nothing per tick.  Delays past the coarsest wheel
+    are parked in it and re-filed until due.
+    """
+    def __init__(self, slot_bits=8, levels=3):
+        self.slot_bits = slot_bits
+        self.mask = (1 << slot_bits) - 1
+        self.wheels = [[[] for _ in range(1 << slot_bits)] for _ in range(levels)]
+        self.now = 0
+        self.pending = 0
+
+    def __len__(self):
+        return self.pending
+
+    def schedule(self, delay, callback, *args):
+        """Call callback(*args) delay ticks from now; returns a cancel handle"""
+        entry = [self.now + max(1, int(delay)), callback, args]
+        self._file(entry)
+        self.pending += 1
+        return entry
+
+    def cancel(self, entry):
+        if entry is not None and entry[1] is not None:
+            entry[1] = None
+            self.pending -= 1
+
+    def remaining(self, entry):
+        """Ticks until entry fires, 0 if it has fired or was cancelled"""
+        if entry is None or entry[1] is None:
+            return 0
+        return entry[0] - self.now
+
+    def _file(self, entry):
+        due = entry[0]
+        bits = self.slot_bits
+        last = len(self.wheels) - 1
+        level = 0
+        while level < last and due >> (bits * (level + 1)) != self.now >> (bits * (level + 1)):
+            level += 1
+        self.wheels[level][(due >> (bits * level)) & self.mask].append(entry)
+
+    def advance(self, ticks=1):
+        """Move the clock on, firing every callback that falls due"""
+        for _ in range(ticks):
+            self.now += 1
+            now = self.now
+            bits = self.slot_bits
+            # Cascade coarser slots whose range starts at this tick
+            for level in range(1, len(self.wheels)):
+                if now & ((1 << (bits * level)) - 1):
+                    break
+                index = (now >> (bits * level)) & self.mask
+                slot = self.wheels[level][index]
+                if slot:
+                    self.wheels[level][index] = []
+                    for entry in slot:
+                        if entry[1] is not None:
+                            self._file(entry)
+            index = now & self.mask
+            slot = self.wheels[0][index]
+            if not slot:
+                continue
+            self.wheels[0][index] = []
+            for entry in slot:
+                callback = entry[1]
+                if callback is None:
+                    continue
+                entry[1] = None
+                self.pending -= 1
+                callback(*entry[2])
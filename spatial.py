@@ -0,0 +1,110 @@
+import numpy as np
+
+class SpatialHash:
+    """Uniform grid over the arena, rebuilt once per frame
+
+    Objects with a rect are bucketed by every cell they touch and looked up
+    with query().  Large batches of points (such as projectile centers) are
+    bucketed with NumPy by insert_points() and looked up with query_points(),
+    which returns array indices, or query_points_batch() for many squares
+    at once.  Every lookup returns candidates only; callers still do the
+    exact overlap test.  Entities outside the arena are kept in the nearest
+    edge cell.
+    """
+    def __init__(self, bounds, cell_size=64):
+        self.cell_size = cell_size
+        self.cols = max(1, -(-bounds[0] // cell_size))
+        self.rows = max(1, -(-bounds[1] // cell_size))
+        self.layers = {}
+        self.point_layers = {}
+
+    def clear(self):
+        self.layers.clear()
+        self.point_layers.clear()
+
+    def cell_range(self, rect, margin=0):
+        """Return the (first col, first row, last col, last row) rect covers"""
+        size = self.cell_size
+        c0 = min(max(int((rect.left - margin) // size), 0), self.cols - 1)
+        r0 = min(max(int((rect.top - margin) // size), 0), self.rows - 1)
+        c1 = min(max(int((rect.right + margin) // size), 0), self.cols - 1)
+        r1 = min(max(int((rect.bottom + margin) // size), 0), self.rows - 1)
+        return c0, r0, c1, r1
+
+    def insert(self, item, rect, layer="default"):
+        cells = self.layers.setdefault(layer, {})
+        c0, r0, c1, r1 = self.cell_range(rect)
+        for row in range(r0, r1 + 1):
+            for col in range(c0, c1 + 1):
+                cells.setdefault(row * self.cols + col, []).append(item)
+
+    def query(self, rect, layer=None):
+        """Return the items near rect, in insertion order
+
+        With no layer every object layer is searched.
+        """
+        layers = self.layers.values() if layer is None else [self.layers.get(layer, {})]
+        c0, r0, c1, r1 = self.cell_range(rect)
+        found = {}
+        for cells in layers:
+            for row in range(r0, r1 + 1):
+                for col in range(c0, c1 + 1):
+                    for item in cells.get(row * self.cols + col, ()):
+                        found[id(item)] = item
+        return list(found.values())
+
+    def insert_points(self, xs, ys, layer, margin=0):
+        """Bucket a whole array of points at once
+
+        margin is how far an entity extends from its point, so queries
+        also reach into neighbouring cells.
+        """
+        size = self.cell_size
+        cols = np.minimum(np.maximum((xs // size).astype(np.intp), 0), self.cols - 1)
+        rows = np.minimum(np.maximum((ys // size).astype(np.intp), 0), self.rows - 1)
+        cells = rows * self.cols + cols
+        order = np.argsort(cells, kind="stable")
+        starts = np.zeros(self.cols * self.rows + 1, dtype=np.intp)
+        np.cumsum(np.bincount(cells, minlength=self.cols * self.rows), out=starts[1:])
+        self.point_layers[layer] = (order, starts, margin)
+
+    def query_points(self, rect, layer):
+        """Return the indices of points near rect, in ascending order"""
+        if layer not in self.point_layers:
+            return np.empty(0, dtype=np.intp)
+        order, starts, margin = self.point_layers[layer]
+        c0, r0, c1, r1 = self.cell_range(rect, margin)
+        # Cells of one row are contiguous in the sorted order
+        chunks = [order[starts[row * self.cols + c0]:starts[row * self.cols + c1 + 1]]
+                  for row in range(r0, r1 + 1)]
+        return np.sort(np.concatenate(chunks))
+
+    def query_points_batch(self, xs, ys, half, layer):
+        """query_points() for a whole array of squares at once
+
+        Each query is the square reaching half from (xs[k], ys[k]).  Returns
+        (query index, point index) candidate pairs in a repeatable but
+        unsorted order; callers sort what survives their exact test.
+        """
+        empty = np.empty(0, dtype=np.intp)
+        if layer not in self.point_layers or len(xs) == 0:
+            return empty, empty
+        order, starts, margin = self.point_layers[layer]
+        size = self.cell_size
+        reach = half + margin
+        c0 = np.clip(((xs - reach) // size).astype(np.intp), 0, self.cols - 1)
+        c1 = np.clip(((xs + reach) // size).astype(np.intp), 0, self.cols - 1)
+        r0 = np.clip(((ys - reach) // size).astype(np.intp), 0, self.rows - 1)
+        r1 = np.clip(((ys + reach) // size).astype(np.intp), 0, self.rows - 1)
+        queries, points = [], []
+        # One pass per row offset; each query's cells in a row are one run
+        for step in range(int((r1 - r0).max()) + 1):
+            active = np.flatnonzero(r0 + step <= r1)
+            base = (r0[active] + step) * self.cols
+            first = starts[base + c0[active]]
+            counts = starts[base + c1[active] + 1] - first
+            run_starts = np.repeat(np.cumsum(counts) - counts, counts)
+            within = np.arange(int(counts.sum())) - run_starts
+            queries.append(np.repeat(active, counts))
+            points.append(order[np.repeat(first, counts) + within])
+        return np.concatenate(queries), np.concatenate(points)
@@ -0,0 +1,82 @@
+import threading
+import time
+
+class StartupLoader:
+    """Staged startup: the foreground shows the menu while a thread loads the rest
+
+    mark(name) records a foreground stage that ended now.  add() queues a
+    loading stage and start() runs the queue in order on a daemon thread;
+    a stage that raises is reported and skipped, so the later ones still
+    run.  wait() blocks until loading is done and is only slow if the
+    player starts before it finishes.  report() lists every stage's start
+    and duration in ms since the loader was created.
+    """
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.last = self.origin
+        self.stages = []  # (name, thread, start_ms, duration_ms)
+        self.tasks = []
+        self.errors = {}
+        self.first_frame_ms = None
+        self.loaded_ms = None
+        self.done = threading.Event()
+        self.thread = None
+
+    def elapsed_ms(self, since=None):
+        return (time.perf_counter() - (self.origin if since is None else since)) * 1000
+
+    def record(self, name, thread, started):
+        self.stages.append((name, thread, (started - self.origin) * 1000,
+                            self.elapsed_ms(started)))
+
+    def mark(self, name):
+        """Record the foreground stage between the last mark and now"""
+        self.record(name, "main", self.last)
+        self.last = time.perf_counter()
+
+    def frame_shown(self):
+        """Record the first frame on screen (later calls do nothing)"""
+        if self.first_frame_ms is None:
+            self.mark("first frame")
+            self.first_frame_ms = self.elapsed_ms()
+
+    def add(self, name, function, *args):
+        self.tasks.append((name, function, args))
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="loader", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        for name, function, args in self.tasks:
+            started = time.perf_counter()
+            try:
+                function(*args)
+            except Exception as e:
+                self.errors[name] = e
+                print(f"Error loading {name}: {e}")
+            self.record(name, "loader", started)
+        self.loaded_ms = self.elapsed_ms()
+        self.done.set()
+
+    def ready(self):
+        return self.done.is_set()
+
+    def wait(self):
+        """Block until every loading stage has finished"""
+        # The loader's own stages cannot wait for themselves
+        if self.thread is None or self.ready() or threading.current_thread() is self.thread:
+            return
+        started = time.perf_counter()
+        self.done.wait()
+        self.record("waited", "main", started)
+
+    def report(self):
+        lines = ["stage            thread   start ms  took ms"]
+        for name, thread, start_ms, duration_ms in sorted(self.stages, key=lambda stage: stage[2]):
+            lines.append(f"{name:<16} {thread:<7} {start_ms:9.1f} {duration_ms:8.1f}")
+        if self.first_frame_ms is not None:
+            lines.append(f"first frame after {self.first_frame_ms:.1f} ms")
+        if self.loaded_ms is not None:
+            lines.append(f"loaded after {self.loaded_ms:.1f} ms")
+        return "\n".join(lines)
@@ -0,0 +1,69 @@
+from collections import OrderedDict
+import pygame
+
+DIGITS = "0123456789-."
+
+class GlyphAtlas:
+    """Pre-rendered glyphs for a small character set packed on one surface
+
+    Strings made only of these characters, such as counters, are drawn
+    glyph by glyph from the atlas instead of going through the font.
+    """
+    def __init__(self, font, color, chars=DIGITS):
+        glyphs = [font.render(char, True, color) for char in chars]
+        width = sum(glyph.get_width() for glyph in glyphs)
+        height = max(glyph.get_height() for glyph in glyphs)
+        self.image = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.areas = {}
+        x = 0
+        for char, glyph in zip(chars, glyphs):
+            # BLEND_RGBA_MAX onto the cleared atlas copies pixels unblended
+            self.image.blit(glyph, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            self.areas[char] = pygame.Rect(x, 0, glyph.get_width(), glyph.get_height())
+            x += glyph.get_width()
+        self.height = height
+
+    def width(self, text):
+        return sum(self.areas[char].width for char in text)
+
+    def draw(self, blit, text, position):
+        """Draw text with blit(image, position, area), return the end x"""
+        x, y = position
+        for char in text:
+            area = self.areas[char]
+            blit(self.image, (x, y), area)
+            x += area.width
+        return x
+
+class TextCache:
+    """Rendered text surfaces keyed by (font, text, color), LRU evicted"""
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.atlases = {}
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def atlas(self, font, color, chars=DIGITS):
+        key = (font, color, chars)
+        if key not in self.atlases:
+            self.atlases[key] = GlyphAtlas(font, color, chars)
+        return self.atlases[key]
+
+    def clear(self):
+        self.surfaces.clear()
+        self.atlases.clear()
@@ -0,0 +1,389 @@
+"""Many Shadow Self matches stepped together in NumPy
+
+VectorEnv keeps the state of N independent matches in arrays and advances
+all of them with one step() call, for training and evaluating bots against
+the shadow AI without N pygame loops.  It follows the Simulation rules
+(movement, dashing, the shadow's three attack patterns, projectiles,
+power-ups, contact damage and the level timer) with three simplifications:
+positions are kept as floats instead of integer rects, hit boxes have
+a fixed size instead of following the rotated sprite, and the shadow
+always plays the fixed attack patterns.  From level 6 up the game's
+shadow is steered by the lookahead ShadowPlanner instead (the
+"shadow_planner" level setting), so at those levels the env is an easier
+opponent than the game and results do not carry over directly.
+
+    env = VectorEnv(256, level=3, seed=1)
+    obs = env.reset()
+    obs, reward, done, info = env.step(actions)   # actions: (256, 4) ints
+"""
+import numpy as np
+from Shadow import WIDTH, HEIGHT, TICK_RATE, SHADOW_SHOT_DAMAGE, level_config
+
+# Action columns: move x (-1, 0, 1), move y (-1, 0, 1), dash (0/1), shoot (0/1)
+ACTION_SIZE = 4
+POWERUP_TYPES = ("health", "energy", "speed", "shield", "damage")
+
+# Hit box sizes of the generated sprites (64px crystals and 48px power-ups
+# drawn at half and full scale) and the projectile store's defaults
+ACTOR_SIZE = 32
+POWERUP_SIZE = 48
+PROJECTILE_SIZE = 10
+PROJECTILE_SPEED = 7
+
+PLAYER_FEATURES = 9
+SHADOW_FEATURES = 7
+PROJECTILE_FEATURES = 4
+POWERUP_FEATURES = 3
+
+class VectorEnv:
+    """N matches of one level stepped in lockstep, auto-reset when done
+
+    step() returns observations of shape (N, observation_size): the
+    player, the shadow and the time left, followed by the nearest
+    `nearest_projectiles` shadow projectiles and `nearest_powerups`
+    power-ups relative to the player.  With frame_size set, info["frame"]
+    also holds an (N, h, w, 3) uint8 framebuffer with the player and its
+    shots, the shadow and its shots and the power-ups in separate
+    channels.
+    """
+    def __init__(self, num_envs, level=1, seed=None, config=None, projectile_slots=64,
+                 powerup_slots=8, nearest_projectiles=8, nearest_powerups=2, frame_size=None):
+        self.num_envs = num_envs
+        self.level = level
+        if config is None:
+            # As in Simulation, the table's shadow_damage only applies to fixed configs
+            config = level_config(level)
+            config["shadow_damage"] = SHADOW_SHOT_DAMAGE
+        self.config = config
+        self.rng = np.random.default_rng(seed)
+        self.projectile_slots = projectile_slots
+        self.powerup_slots = powerup_slots
+        self.nearest_projectiles = nearest_projectiles
+        self.nearest_powerups = nearest_powerups
+        self.frame_size = frame_size
+        self.observation_size = (PLAYER_FEATURES + SHADOW_FEATURES + 1 +
+                                 nearest_projectiles * PROJECTILE_FEATURES +
+                                 nearest_powerups * POWERUP_FEATURES)
+        self.envs = np.arange(num_envs)
+        self.time_limit_ticks = self.config["time_limit"] * TICK_RATE
+
+        n, p, k = num_envs, projectile_slots, powerup_slots
+        # Player
+        self.player_pos = np.zeros((n, 2))
+        self.health = np.zeros(n)
+        self.max_health = np.zeros(n)
+        self.energy = np.zeros(n)
+        self.max_energy = np.zeros(n)
+        self.speed = np.zeros(n)
+        self.base_speed = np.zeros(n)
+        self.speed_boost_timer = np.zeros(n, dtype=np.int32)
+        self.invulnerable_timer = np.zeros(n, dtype=np.int32)
+        self.dash_cooldown = np.zeros(n, dtype=np.int32)
+        self.shield = np.zeros(n)
+        self.damage_multiplier = np.zeros(n)
+        self.score = np.zeros(n, dtype=np.int64)
+        # Shadow
+        self.shadow_pos = np.zeros((n, 2))
+        self.shadow_health = np.zeros(n)
+        self.shadow_speed = np.zeros(n)
+        self.shadow_damage = np.zeros(n)
+        self.shoot_delay = np.zeros(n, dtype=np.int32)
+        self.shoot_timer = np.zeros(n, dtype=np.int32)
+        self.attack_pattern = np.zeros(n, dtype=np.int32)
+        self.pattern_timer = np.zeros(n, dtype=np.int32)
+        # Projectiles live in a ring of slots per match; the oldest shot is
+        # overwritten if a match ever fills its ring
+        self.shot_pos = np.zeros((n, p, 2))
+        self.shot_vel = np.zeros((n, p, 2))
+        self.shot_alive = np.zeros((n, p), dtype=bool)
+        self.shot_player = np.zeros((n, p), dtype=bool)
+        self.shot_damage = np.zeros((n, p))
+        self.shot_head = np.zeros(n, dtype=np.int64)
+        # Power-ups
+        self.powerup_pos = np.zeros((n, k, 2))
+        self.powerup_type = np.zeros((n, k), dtype=np.int8)
+        self.powerup_life = np.zeros((n, k), dtype=np.int32)
+        # Match
+        self.ticks = np.zeros(n, dtype=np.int64)
+
+    def reset(self):
+        self.reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self.observe()
+
+    def reset_envs(self, mask):
+        """Start a fresh match in every env where mask is set"""
+        config = self.config
+        self.player_pos[mask] = (WIDTH // 4, HEIGHT // 2)
+        self.health[mask] = self.max_health[mask] = 100
+        self.energy[mask] = self.max_energy[mask] = 100
+        self.speed[mask] = self.base_speed[mask] = 5
+        self.speed_boost_timer[mask] = 0
+        self.invulnerable_timer[mask] = 0
+        self.dash_cooldown[mask] = 0
+        self.shield[mask] = 0
+        self.damage_multiplier[mask] = 1
+        self.score[mask] = 0
+        self.shadow_pos[mask] = (WIDTH * 3 // 4, HEIGHT // 2)
+        self.shadow_health[mask] = config["shadow_health"]
+        self.shadow_speed[mask] = config["shadow_speed"]
+        self.shadow_damage[mask] = config["shadow_damage"]
+        self.shoot_delay[mask] = max(30 - self.level * 5, 10)
+        self.shoot_timer[mask] = 0
+        self.attack_pattern[mask] = 0
+        self.pattern_timer[mask] = 0
+        self.shot_alive[mask] = False
+        self.shot_head[mask] = 0
+        self.powerup_life[mask] = 0
+        self.ticks[mask] = 0
+
+    def step(self, actions):
+        """Advance every match one tick; finished matches restart"""
+        actions = np.asarray(actions)
+        shadow_health = self.shadow_health.copy()
+        taken = self.health + self.shield
+
+        self.ticks += 1
+        self.update_player(actions)
+        self.update_shadow()
+        self.update_shots()
+        self.update_powerups()
+        self.handle_collisions()
+
+        # Reward damage dealt, penalize damage taken, +-1 for the outcome
+        won = self.shadow_health <= 0
+        lost = ~won & ((self.health <= 0) | (self.ticks >= self.time_limit_ticks))
+        taken = np.maximum(taken - self.health - self.shield, 0)
+        reward = (shadow_health - self.shadow_health - taken) / 100 + won.astype(np.float64) - lost
+        done = won | lost
+        info = {"won": won, "ticks": self.ticks.copy(), "score": self.score.copy()}
+        if done.any():
+            self.reset_envs(done)
+        if self.frame_size is not None:
+            info["frame"] = self.render()
+        return self.observe(), reward, done, info
+
+    def update_player(self, actions):
+        move = actions[:, :2].astype(np.float64) * self.speed[:, None]
+        diagonal = (move[:, 0] != 0) & (move[:, 1] != 0)
+        move[diagonal] *= 0.707
+        self.player_pos += move
+
+        dash = ((actions[:, 2] != 0) & (self.dash_cooldown <= 0) &
+                (self.energy >= 30) & move.any(axis=1))
+        self.energy[dash] -= 30
+        self.invulnerable_timer[dash] = 20
+        self.dash_cooldown[dash] = 60
+        self.player_pos[dash] += move[dash] * 5
+
+        # Three-way shot with energy to spare, like Player.shoot
+        shoot = (actions[:, 3] != 0) & (self.energy >= 20)
+        spread = shoot & (self.energy >= 60)
+        self.fire(shoot & ~spread, self.player_pos, 1, np.zeros((self.num_envs, 1)),
+                  True, 10 * self.damage_multiplier)
+        self.fire(spread, self.player_pos, 1, np.tile([-10.0, 0.0, 10.0], (self.num_envs, 1)),
+                  True, 10 * self.damage_multiplier)
+        self.energy[shoot] -= 20
+
+        boosted = self.speed_boost_timer > 0
+        self.speed_boost_timer[boosted] -= 1
+        expired = boosted & (self.speed_boost_timer <= 0)
+        self.speed[expired] = self.base_speed[expired]
+        self.invulnerable_timer[self.invulnerable_timer > 0] -= 1
+        self.dash_cooldown[self.dash_cooldown > 0] -= 1
+        self.energy[self.energy < self.max_energy] += 0.5
+
+        half = ACTOR_SIZE / 2
+        np.clip(self.player_pos[:, 0], half, WIDTH - half, out=self.player_pos[:, 0])
+        np.clip(self.player_pos[:, 1], half, HEIGHT - half, out=self.player_pos[:, 1])
+
+    def update_shadow(self):
+        self.pattern_timer += 1
+        switch = self.pattern_timer >= 180
+        self.attack_pattern[switch] = (self.attack_pattern[switch] + 1) % 3
+        self.pattern_timer[switch] = 0
+
+        # Mirror the player across the arena, circle it, or chase it
+        target = self.player_pos.copy()
+        target[:, 0] = np.where(self.attack_pattern == 0, WIDTH - target[:, 0], target[:, 0])
+        offset = target - self.shadow_pos
+        dist = np.hypot(offset[:, 0], offset[:, 1])
+        step = np.where(self.attack_pattern == 2, self.shadow_speed * 1.5, self.shadow_speed)
+        moving = (self.attack_pattern != 1) & (dist > 0)
+        self.shadow_pos[moving] += (offset[moving] / dist[moving, None]) * step[moving, None]
+        circling = self.attack_pattern == 1
+        angle = self.pattern_timer[circling] * 0.05
+        self.shadow_pos[circling] = (self.player_pos[circling] +
+                                     np.stack((np.cos(angle), np.sin(angle)), axis=1) * 150)
+
+        self.shoot_timer += 1
+        shoot = self.shoot_timer >= self.shoot_delay
+        self.shoot_timer[shoot] = 0
+        to_player = self.player_pos - self.shadow_pos
+        aimed = np.degrees(np.arctan2(to_player[:, 1], to_player[:, 0]))
+        self.fire(shoot & (self.attack_pattern == 0), self.shadow_pos, -1,
+                  np.zeros((self.num_envs, 1)), False, self.shadow_damage)
+        self.fire(shoot & (self.attack_pattern == 1), self.shadow_pos, -1,
+                  np.tile([-30.0, 0.0, 30.0], (self.num_envs, 1)), False, self.shadow_damage)
+        self.fire(shoot & (self.attack_pattern == 2), self.shadow_pos, -1,
+                  aimed[:, None], False, self.shadow_damage)
+
+    def fire(self, mask, origin, direction, angles, player, damage):
+        """Spawn one shot per angle column in every env where mask is set"""
+        envs = np.flatnonzero(mask)
+        if len(envs) == 0:
+            return
+        count = angles.shape[1]
+        slots = (self.shot_head[envs, None] + np.arange(count)) % self.projectile_slots
+        self.shot_head[envs] = (self.shot_head[envs] + count) % self.projectile_slots
+        radians = np.radians(angles[envs])
+        rows = envs[:, None]
+        self.shot_pos[rows, slots] = origin[envs, None, :]
+        self.shot_vel[rows, slots, 0] = PROJECTILE_SPEED * direction * np.cos(radians)
+        self.shot_vel[rows, slots, 1] = PROJECTILE_SPEED * np.sin(radians)
+        self.shot_alive[rows, slots] = True
+        self.shot_player[rows, slots] = player
+        self.shot_damage[rows, slots] = damage[envs, None]
+
+    def update_shots(self):
+        self.shot_pos += self.shot_vel
+        half = PROJECTILE_SIZE / 2
+        x = self.shot_pos[..., 0]
+        y = self.shot_pos[..., 1]
+        self.shot_alive &= ((x + half >= 0) & (x - half <= WIDTH) &
+                            (y + half >= 0) & (y - half <= HEIGHT))
+
+    def update_powerups(self):
+        self.powerup_life[self.powerup_life > 0] -= 1
+        spawn = self.rng.random(self.num_envs) < self.config["powerup_frequency"]
+        envs = np.flatnonzero(spawn)
+        if len(envs) == 0:
+            return
+        # Use the first free slot; a match with every slot taken skips the spawn
+        free = self.powerup_life[envs] <= 0
+        has_free = free.any(axis=1)
+        envs, slots = envs[has_free], free[has_free].argmax(axis=1)
+        self.powerup_pos[envs, slots, 0] = self.rng.integers(50, WIDTH - 50, len(envs), endpoint=True)
+        self.powerup_pos[envs, slots, 1] = self.rng.integers(50, HEIGHT - 50, len(envs), endpoint=True)
+        self.powerup_type[envs, slots] = self.rng.integers(0, len(POWERUP_TYPES), len(envs))
+        self.powerup_life[envs, slots] = 300
+
+    def overlaps(self, pos, centers, size):
+        """Mask of centers (N, M, 2) whose boxes overlap the actor at pos (N, 2)"""
+        reach = (ACTOR_SIZE + size) / 2
+        offset = np.abs(centers - pos[:, None, :])
+        return (offset[..., 0] < reach) & (offset[..., 1] < reach)
+
+    def handle_collisions(self):
+        # Player shots hitting the shadow
+        near_shadow = self.overlaps(self.shadow_pos, self.shot_pos, PROJECTILE_SIZE)
+        shadow_hits = self.shot_alive & self.shot_player & near_shadow
+        self.shadow_health -= (self.shot_damage * shadow_hits).sum(axis=1)
+        self.score += 50 * shadow_hits.sum(axis=1)
+
+        # Shadow shots hitting the player; hits are used up even while invulnerable
+        near_player = self.overlaps(self.player_pos, self.shot_pos, PROJECTILE_SIZE)
+        player_hits = self.shot_alive & ~self.shot_player & near_player
+        vulnerable = self.invulnerable_timer <= 0
+        damage = (self.shot_damage * player_hits).sum(axis=1) * vulnerable
+        shielded = self.shield > 0
+        self.shield -= np.where(shielded, damage, 0)
+        self.health -= np.where(shielded, 0, damage)
+        self.shot_alive &= ~(shadow_hits | player_hits)
+
+        # Power-ups (the Simulation applies health, energy and speed only)
+        picked = (self.powerup_life > 0) & self.overlaps(self.player_pos, self.powerup_pos,
+                                                         POWERUP_SIZE)
+        if picked.any():
+            for type_index in range(3):
+                envs = np.flatnonzero((picked & (self.powerup_type == type_index)).any(axis=1))
+                if type_index == 0:
+                    self.health[envs] = np.minimum(self.max_health[envs], self.health[envs] + 30)
+                elif type_index == 1:
+                    self.energy[envs] = self.max_energy[envs]
+                else:
+                    self.speed[envs] = self.base_speed[envs] * 1.5
+                    self.speed_boost_timer[envs] = 180
+            self.score += 100 * picked.sum(axis=1)
+            self.powerup_life[picked] = 0
+
+        # Touching the shadow
+        offset = np.abs(self.player_pos - self.shadow_pos)
+        contact = (offset < ACTOR_SIZE).all(axis=1) & vulnerable
+        self.health[contact] -= 1
+
+    def observe(self):
+        n = self.num_envs
+        obs = np.zeros((n, self.observation_size), dtype=np.float32)
+        scale = np.array([WIDTH, HEIGHT])
+        obs[:, 0:2] = self.player_pos / scale
+        obs[:, 2] = self.health / self.max_health
+        obs[:, 3] = self.energy / self.max_energy
+        obs[:, 4] = self.shield / 100
+        obs[:, 5] = self.invulnerable_timer / 20
+        obs[:, 6] = self.dash_cooldown / 60
+        obs[:, 7] = self.speed / self.base_speed
+        obs[:, 8] = self.damage_multiplier
+        column = PLAYER_FEATURES
+        obs[:, column:column + 2] = (self.shadow_pos - self.player_pos) / scale
+        obs[:, column + 2] = self.shadow_health / self.config["shadow_health"]
+        obs[:, column + 3] = self.shoot_timer / self.shoot_delay
+        obs[self.envs, column + 4 + self.attack_pattern] = 1
+        column += SHADOW_FEATURES
+        obs[:, column] = 1 - self.ticks / self.time_limit_ticks
+        column += 1
+
+        # Nearest live shadow shots: relative position and velocity
+        k = self.nearest_projectiles
+        if k:
+            offsets = self.shot_pos - self.player_pos[:, None, :]
+            dist = np.hypot(offsets[..., 0], offsets[..., 1])
+            dist[~self.shot_alive | self.shot_player] = np.inf
+            nearest = np.argpartition(dist, k - 1, axis=1)[:, :k] if k < dist.shape[1] else \
+                np.argsort(dist, axis=1)[:, :k]
+            rows = self.envs[:, None]
+            live = np.isfinite(dist[rows, nearest])[..., None]
+            features = np.concatenate((offsets[rows, nearest] / scale,
+                                       self.shot_vel[rows, nearest] / PROJECTILE_SPEED), axis=2)
+            obs[:, column:column + k * PROJECTILE_FEATURES] = \
+                (features * live).reshape(n, -1)
+            column += k * PROJECTILE_FEATURES
+
+        # Nearest power-ups: relative position and type
+        k = self.nearest_powerups
+        if k:
+            offsets = self.powerup_pos - self.player_pos[:, None, :]
+            dist = np.hypot(offsets[..., 0], offsets[..., 1])
+            dist[self.powerup_life <= 0] = np.inf
+            nearest = np.argsort(dist, axis=1)[:, :k]
+            rows = self.envs[:, None]
+            live = np.isfinite(dist[rows, nearest])[..., None]
+            features = np.concatenate((offsets[rows, nearest] / scale,
+                                       (self.powerup_type[rows, nearest, None] + 1) /
+                                       len(POWERUP_TYPES)), axis=2)
+            obs[:, column:column + k * POWERUP_FEATURES] = (features * live).reshape(n, -1)
+        return obs
+
+    def render(self):
+        """Downscaled (N, h, w, 3) frames: player, shadow and power-up channels"""
+        w, h = self.frame_size
+        frames = np.zeros((self.num_envs, h, w, 3), dtype=np.uint8)
+        sx, sy = w / WIDTH, h / HEIGHT
+
+        def plot(envs, pos, channel, value):
+            x = np.clip((pos[..., 0] * sx).astype(np.intp), 0, w - 1)
+            y = np.clip((pos[..., 1] * sy).astype(np.intp), 0, h - 1)
+            frames[envs, y, x, channel] = value
+
+        envs, slots = np.nonzero(self.shot_alive)
+        player_shot = self.shot_player[envs, slots]
+        plot(envs, self.shot_pos[envs, slots], np.where(player_shot, 0, 1), 128)
+        envs, slots = np.nonzero(self.powerup_life > 0)
+        plot(envs, self.powerup_pos[envs, slots], 2, 255)
+
+        # Actors as small squares so they stay visible when downscaled
+        radius = max(1, int(ACTOR_SIZE / 2 * sx))
+        offsets = np.arange(-radius, radius + 1) / sx
+        grid = np.stack(np.meshgrid(offsets, offsets), axis=-1).reshape(-1, 2)
+        for pos, channel in ((self.player_pos, 0), (self.shadow_pos, 1)):
+            plot(self.envs[:, None], pos[:, None, :] + grid, channel, 255)
+        return frames